@@ -0,0 +1,6 @@
+"""
+Storage benchmarks. Run a module directly, e.g.:
+
+    python -m benchmarks.compression
+    python -m benchmarks.storage --scales small,medium
+"""
@@ -0,0 +1,70 @@
+"""
+Read latency vs. stored size of game values per compression.
+
+    python -m benchmarks.compression [--json]
+
+For synthetic scripts of growing size, encodes the `source`, `scenes` and
+`data` values the way `Games.create` stores them and reports stored bytes
+and median encode/decode time for every registered compression.
+"""
+import json
+import statistics
+import sys
+import time
+
+import parsing
+from database import _codec
+
+from .synthetic import make_script
+
+SCENE_COUNTS = (10, 50, 200, 1000)
+REPEAT = 15
+
+
+def median_ms(fn, repeat: int = REPEAT) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def run() -> list[dict]:
+    results = []
+    for scenes in SCENE_COUNTS:
+        src = make_script(scenes, seed=scenes)
+        data = parsing.analyze(src)
+        values = {"source": src, "scenes": data["scenes"], "data": data}
+        for field, value in values.items():
+            raw = len(_codec.encode(value, compression=_codec.NO_COMPRESSION))
+            for compression in _codec.COMPRESSIONS.values():
+                encoded = _codec.encode(value, compression=compression, threshold=0)
+                results.append({
+                    "scenes": scenes,
+                    "field": field,
+                    "compression": compression.name,
+                    "raw_bytes": raw,
+                    "stored_bytes": len(encoded),
+                    "ratio": round(raw / len(encoded), 2),
+                    "encode_ms": round(median_ms(lambda: _codec.encode(value, compression=compression, threshold=0)), 3),
+                    "decode_ms": round(median_ms(lambda: _codec.decode(encoded)), 3),
+                })
+    return results
+
+
+def main():
+    results = run()
+    if "--json" in sys.argv:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'scenes':>6} {'field':<7} {'codec':<5} {'raw':>9} {'stored':>9} {'ratio':>6} {'enc ms':>8} {'dec ms':>8}")
+    for r in results:
+        print(
+            f"{r['scenes']:>6} {r['field']:<7} {r['compression']:<5} {r['raw_bytes']:>9} "
+            f"{r['stored_bytes']:>9} {r['ratio']:>6} {r['encode_ms']:>8} {r['decode_ms']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
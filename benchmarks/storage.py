@@ -0,0 +1,232 @@
+"""
+Storage operation latencies on synthetic trees of several sizes.
+
+    python -m benchmarks.storage [--scales small,medium] [--samples 200]
+                                 [--json] [--out results.json]
+                                 [--baseline results.json] [--max-regression 0.25]
+
+Each scale is generated into a scratch directory with the storage
+primitives, then `File.get_value`/`set_value`, `File.all`, `Game(...)`,
+`Users.name_id`, `Ids.make_game_id` and `Games.create` are timed on it.
+With `--baseline`, medians more than `--max-regression` slower than the
+baseline's are reported and the exit status is 1. `benchmarks/results.json`
+holds the small scale on both backends, for comparison:
+
+    python -m benchmarks.storage --scales small --baseline benchmarks/results.json
+
+The backend follows QUESTLY_DB_BACKEND as usual; the data paths are
+always pointed at the scratch directory.
+"""
+import os
+import sys
+import tempfile
+
+# The storage modules read their configuration once, when imported.
+if "database._disk" in sys.modules:
+    raise RuntimeError("benchmarks.storage must be imported before the database package")
+WORKDIR = tempfile.mkdtemp(prefix="questly-bench-")
+os.environ["QUESTLY_DB_PATH"] = os.path.join(WORKDIR, "data")
+os.environ["QUESTLY_DB_SQLITE_PATH"] = os.path.join(WORKDIR, "data.sqlite3")
+
+import json
+import random
+import shutil
+import statistics
+import time
+from contextlib import nullcontext
+from typing import Callable, Iterable
+
+import parsing
+from database import _disk, database, hashing
+
+from .synthetic import make_script
+
+SCALES = {
+    "small": {"users": 1_000, "games": 5_000, "stars": 20_000},
+    "medium": {"users": 10_000, "games": 50_000, "stars": 250_000},
+    "large": {"users": 100_000, "games": 500_000, "stars": 2_000_000},
+}
+SAMPLES = 200
+MAX_REGRESSION = 0.25
+FIRST_USER_ID = 100_000_000
+
+
+def user_id(i: int) -> str:
+    return str(FIRST_USER_ID + i)
+
+
+def game_id(j: int, users: int) -> str:
+    return f"{user_id(j % users)}:{j // users + 1}"
+
+
+# -----------------------------
+# Synthetic trees
+# -----------------------------
+def populate(disk: _disk.Disk, users: int, games: int, stars: int, seed: int = 0):
+    """
+    Writes a tree in the layout `Games.create` and `User.create` produce,
+    through the primitives only, so generation skips caches and locks.
+    """
+    rng = random.Random(seed)
+    data = parsing.analyze(make_script(8, seed))
+    stored = database.Games._stored_data(data)
+
+    def write(path: str, value):
+        disk._write_value(disk._fs_path(path), value)
+
+    transaction = getattr(disk, "_transaction", nullcontext)
+    with transaction():
+        for i in range(users):
+            uid = user_id(i)
+            write(f"users/{uid}/info/name", f"user{i}")
+            hashing.index.put("users", uid)
+        for j in range(games):
+            gid, uid = game_id(j, users), user_id(j % users)
+            game = f"games/{gid}"
+            write(f"{game}/creator", uid)
+            write(f"{game}/data", stored)
+            write(f"{game}/source", data["meta"]["src"])
+            write(f"{game}/scenes", data["scenes"])
+            for key, value in dict(data["info"], name=f"Game {j}").items():
+                write(f"{game}/info/{key}", value)
+            disk._make_dir(disk._fs_path(f"{game}/stars"))
+            disk._make_dir(disk._fs_path(f"{game}/collections"))
+            write(f"users/{uid}/games/{gid}", True)
+            hashing.index.put("games", gid)
+        for _ in range(stars):
+            gid = game_id(rng.randrange(games), users)
+            write(f"games/{gid}/stars/{user_id(rng.randrange(users))}", rng.randint(1, 5))
+
+
+def reset_caches():
+    """
+    Forgets everything held in memory, as in a freshly started process;
+    the in-memory indexes reload from the Disk on their next use.
+    """
+    database.disk.paths.clear()
+    database.disk.values.clear()
+    for region in list(_disk.Ram._regions.values()):
+        region.clear()
+    for index in (database.creators, database.top_rated, database.rankings, database.search):
+        index.reload()
+    hashing.index.reset()
+
+
+# -----------------------------
+# Timing
+# -----------------------------
+def measure(fn: Callable, args: Iterable, before: Callable | None = None) -> dict:
+    samples = []
+    for arg in args:
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    median = statistics.median(samples)
+    return {
+        "n": len(samples),
+        "median_us": round(median * 1e6, 1),
+        "p95_us": round(samples[int(len(samples) * 0.95) - 1 if len(samples) > 1 else 0] * 1e6, 1),
+        "ops_per_s": round(1 / median) if median else None,
+    }
+
+
+def run_scale(name: str, users: int, games: int, stars: int, samples: int = SAMPLES) -> dict:
+    disk = database.disk
+    disk.clear()
+    reset_caches()
+    start = time.perf_counter()
+    populate(disk, users, games, stars)
+    populate_s = time.perf_counter() - start
+    reset_caches()
+
+    rng = random.Random(1)
+    some_games = [game_id(rng.randrange(games), users) for _ in range(samples)]
+    some_users = [user_id(rng.randrange(users)) for _ in range(samples)]
+    name_paths = [f"games/{gid}/info/name" for gid in some_games]
+    data = parsing.analyze(make_script(8, 2))
+    rounds = max(3, samples // 50)
+
+    ops = {}
+    ops["get_value.cold"] = measure(lambda p: disk[p].get_value(), name_paths)
+    ops["get_value.warm"] = measure(lambda p: disk[p].get_value(), name_paths)
+    ops["set_value"] = measure(lambda u: disk[f"users/{u}/info/about"].set_value(f"about {u}"), some_users)
+    ops["File.all(stars)"] = measure(lambda g: list(disk[f"games/{g}/stars"].all()), some_games)
+    ops["File.all(users)"] = measure(lambda _: list(disk["users"].all()), range(rounds))
+    ops["Game.cold"] = measure(database.Game, some_games[:rounds * 4], before=reset_caches)
+    ops["Game.warm"] = measure(database.Game, some_games)
+    ops["Users.name_id.cold"] = measure(lambda _: list(database.Users.name_id()), range(rounds), before=reset_caches)
+    ops["Users.name_id.warm"] = measure(lambda _: list(database.Users.name_id()), range(rounds))
+    ops["Ids.make_game_id"] = measure(hashing.Ids.make_game_id, some_users)
+    ops["Games.create"] = measure(lambda u: database.Games.create(u, data), some_users[:rounds * 4])
+
+    return {
+        "scale": name,
+        "backend": _disk.DB_BACKEND,
+        "users": users,
+        "games": games,
+        "stars": stars,
+        "populate_s": round(populate_s, 2),
+        "ops": ops,
+    }
+
+
+def regressions(results: list[dict], baseline: list[dict], max_regression: float) -> list[str]:
+    previous = {(r["scale"], r["backend"]): r["ops"] for r in baseline}
+    found = []
+    for r in results:
+        for op, stats in r["ops"].items():
+            old = previous.get((r["scale"], r["backend"]), {}).get(op)
+            if old and old["median_us"] and stats["median_us"] > old["median_us"] * (1 + max_regression):
+                found.append(
+                    f"{r['scale']}/{op}: {stats['median_us']}us vs {old['median_us']}us "
+                    f"(+{stats['median_us'] / old['median_us'] - 1:.0%})"
+                )
+    return found
+
+
+def _option(args: list[str], name: str, default=None):
+    if name in args:
+        return args[args.index(name) + 1]
+    return default
+
+
+def main(args: list[str] = sys.argv[1:]) -> int:
+    scales = _option(args, "--scales", "small").split(",")
+    samples = int(_option(args, "--samples", SAMPLES))
+    results = []
+    try:
+        for name in scales:
+            print(f"generating {name}: {SCALES[name]}", file=sys.stderr)
+            results.append(run_scale(name, **SCALES[name], samples=samples))
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+    out = _option(args, "--out")
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if "--json" in args:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            print(f"\n{r['scale']} ({r['backend']}): {r['users']} users, {r['games']} games, "
+                  f"{r['stars']} stars, generated in {r['populate_s']}s")
+            print(f"{'op':<22} {'n':>5} {'median us':>11} {'p95 us':>11} {'ops/s':>9}")
+            for op, s in r["ops"].items():
+                print(f"{op:<22} {s['n']:>5} {s['median_us']:>11} {s['p95_us']:>11} {s['ops_per_s']:>9}")
+
+    baseline = _option(args, "--baseline")
+    if baseline:
+        with open(baseline, "r", encoding="utf-8") as f:
+            found = regressions(results, json.load(f), float(_option(args, "--max-regression", MAX_REGRESSION)))
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+import random
+
+# Vocabulary for generated scene text; real scripts repeat words and
+# phrases a lot, which is what makes them compress well.
+WORDS = (
+    "the a you your forest river cave door light dark old path stone "
+    "hear see walk run open close left right north south quiet cold "
+    "wind fire water key map lantern stranger voice shadow tower gate"
+).split()
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def make_script(scenes: int, seed: int = 0) -> str:
+    """
+    A Questly script with `scenes` scenes in the shape creators upload:
+    an info block, then scenes with a few sentences and 2-4 buttons.
+    """
+    rng = random.Random(seed)
+    names = ["init"] + [f"scene_{i}" for i in range(1, scenes)]
+    parts = [
+        "$ info {\n"
+        f'    name = "Synthetic {scenes}";\n'
+        f'    description = "{sentence(rng, 12)}";\n'
+        "    version = 1;\n"
+        '    creator = "bench";\n'
+        '    tags = ["adventure", "benchmark"];\n'
+        "}\n"
+    ]
+    for name in names:
+        message = " ".join(sentence(rng, rng.randint(6, 18)) for _ in range(rng.randint(2, 6)))
+        buttons = "\n".join(
+            f'        {target}("{sentence(rng, 3)}");'
+            for target in rng.sample(names, min(len(names), rng.randint(2, 4)))
+        )
+        parts.append(
+            f"@ {name} {{\n"
+            f'    title = "{sentence(rng, 4)}";\n'
+            f'    message = "{message}";\n'
+            f"    buttons[2] {{\n{buttons}\n    }}\n"
+            "}\n"
+        )
+    return "\n".join(parts)
@@ -1,5 +1,11 @@
-from . import (
-    database
-)
+import importlib
 
-__all__ = ["database"]
\ No newline at end of file
+# `database.database` is imported on first use, not with the package, so
+# light modules such as `database._ram` can be imported without opening
+# the disk and loading the indexes.
+def __getattr__(name: str):
+    if name == "database":
+        return importlib.import_module(f"{__name__}.database")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = ["database"]
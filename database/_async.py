@@ -0,0 +1,170 @@
+import os, asyncio, threading, time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional
+
+from ._disk import Disk, File, PATH, TYPE
+
+IO_WORKERS = int(os.environ.get("QUESTLY_IO_WORKERS", "8"))
+
+
+# -----------------------------
+# I/O executor
+# -----------------------------
+class IOExecutor:
+    """
+    Bounded thread pool for storage calls, with queue-depth metrics.
+    """
+    def __init__(self, max_workers: int = IO_WORKERS):
+        self.max_workers = max_workers
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.queued = 0
+        self.running = 0
+        self.max_queued = 0
+        self.wait_time = 0.0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="questly-io")
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        enqueued = time.perf_counter()
+
+        def run():
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.wait_time += time.perf_counter() - enqueued
+            try:
+                return fn(*args, **kwargs)
+            except BaseException:
+                with self._lock:
+                    self.failed += 1
+                raise
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+
+        with self._lock:
+            self.submitted += 1
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        return self._pool.submit(run)
+
+    def map(self, fn: Callable, items: Iterable) -> List:
+        """
+        Runs `fn` over `items` on the pool and returns results in order;
+        for synchronous callers such as telebot handlers.
+        """
+        return [future.result() for future in [self.submit(fn, item) for item in items]]
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "queued": self.queued,
+                "running": self.running,
+                "max_queued": self.max_queued,
+                "avg_wait": self.wait_time / self.completed if self.completed else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+
+_default_executor: Optional[IOExecutor] = None
+_default_lock = threading.Lock()
+
+def default_executor() -> IOExecutor:
+    global _default_executor
+    with _default_lock:
+        if _default_executor is None:
+            _default_executor = IOExecutor()
+        return _default_executor
+
+
+# -----------------------------
+# Async facade
+# -----------------------------
+class AsyncFile:
+    def __init__(self, disk: "AsyncDisk", file: File):
+        self.disk = disk
+        self.file = file
+
+    @property
+    def path(self) -> PATH:
+        return self.file.path
+
+    @property
+    def name(self) -> str:
+        return self.file.name
+
+    def get(self, subpath: str) -> "AsyncFile":
+        return AsyncFile(self.disk, self.file.get(subpath))
+
+    def __getitem__(self, subpath: str) -> "AsyncFile":
+        return self.get(subpath)
+
+    async def exists(self) -> bool:
+        return await self.disk.run(self.file.exists)
+
+    async def get_value(self, default=None):
+        return await self.disk.run(self.file.get_value, default)
+
+    async def get_value_no_default(self):
+        return await self.disk.run(self.file.get_value_no_default)
+
+    async def set_value(self, value) -> "AsyncFile":
+        await self.disk.run(self.file.set_value, value)
+        return self
+
+    async def delete(self) -> "AsyncFile":
+        await self.disk.run(self.file.delete)
+        return self
+
+    async def mkdir(self) -> "AsyncFile":
+        await self.disk.run(self.file.mkdir)
+        return self
+
+    async def names(self) -> List[str]:
+        return await self.disk.run(lambda: list(self.file.names()))
+
+    async def read_children(
+        self,
+        values: bool = True,
+        project: Optional[Callable[[Any], Any]] = None,
+    ) -> List[tuple[str, TYPE, Any]]:
+        return await self.disk.run(self.file.read_children, values, project)
+
+
+class AsyncDisk:
+    """
+    Awaitable view of a Disk. Calls run on a bounded IOExecutor, so
+    independent reads overlap:
+
+        >>> name, scenes = await adisk.get_values(["games/1:1/info/name", "games/1:1/scenes"])
+    """
+    def __init__(self, disk: Disk, executor: Optional[IOExecutor] = None):
+        self.sync = disk
+        self.executor = executor or default_executor()
+
+    async def run(self, fn: Callable, *args):
+        return await asyncio.wrap_future(self.executor.submit(fn, *args))
+
+    def get(self, path: PATH) -> AsyncFile:
+        return AsyncFile(self, self.sync.get(path))
+
+    def __getitem__(self, path: PATH) -> AsyncFile:
+        return self.get(path)
+
+    async def get_value(self, path: PATH, default=None):
+        return await self.get(path).get_value(default)
+
+    async def set_value(self, path: PATH, value) -> AsyncFile:
+        return await self.get(path).set_value(value)
+
+    async def get_values(self, paths: Iterable[PATH], default=None) -> List:
+        return list(await asyncio.gather(*(self.get_value(path, default) for path in paths)))
@@ -0,0 +1,180 @@
+import os
+import lzma
+import marshal
+import zlib
+from typing import Dict
+
+# -----------------------------
+# Value codecs
+# -----------------------------
+# Non-string values are stored as a 5-byte header followed by the payload:
+#
+#     b"QV" | format version | codec id | compression id | payload...
+#
+# Format version 1 had no compression byte and is still readable.
+# Strings stay plain UTF-8 text, and legacy `.py` literals are still
+# readable, so old trees keep working while they are converted.
+
+MAGIC = b"QV"
+FORMAT_VERSION = 2
+HEADER_SIZES = {1: 4, 2: 5}
+
+# Payloads of at least this many bytes are compressed, unless that does
+# not make them smaller. QUESTLY_COMPRESSION picks "zlib" | "lzma" | "none".
+COMPRESSION_THRESHOLD = int(os.environ.get("QUESTLY_COMPRESSION_THRESHOLD", "1024"))
+COMPRESSION = os.environ.get("QUESTLY_COMPRESSION", "zlib")
+
+
+class CodecError(ValueError):
+    pass
+
+
+class Codec:
+    id: int
+    name: str
+
+    def dumps(self, value) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: bytes):
+        raise NotImplementedError
+
+
+class MarshalCodec(Codec):
+    """
+    Handles every literal type (dict, list, tuple, set, str, bytes,
+    numbers, bool, None) including floats like `inf` whose repr is not
+    a literal. Decoding is a single C call.
+    """
+    id = 1
+    name = "marshal"
+
+    def dumps(self, value) -> bytes:
+        return marshal.dumps(value, 4)
+
+    def loads(self, data: bytes):
+        return marshal.loads(data)
+
+
+class Compression:
+    id: int
+    name: str
+
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    def decompress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+
+class NoCompression(Compression):
+    id = 0
+    name = "none"
+
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+
+class ZlibCompression(Compression):
+    """
+    Fast to decompress; the default for values read on every request.
+    """
+    id = 1
+    name = "zlib"
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class LzmaCompression(Compression):
+    """
+    Smaller output at several times zlib's cost; suited to cold data.
+    """
+    id = 2
+    name = "lzma"
+
+    def compress(self, data: bytes) -> bytes:
+        return lzma.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return lzma.decompress(data)
+
+
+CODECS: Dict[int, Codec] = {}
+COMPRESSIONS: Dict[int, Compression] = {}
+
+
+def register_codec(codec: Codec) -> Codec:
+    if not 0 < codec.id < 256:
+        raise CodecError(f"Codec id must fit in one byte, got {codec.id}")
+    CODECS[codec.id] = codec
+    return codec
+
+
+def register_compression(compression: Compression) -> Compression:
+    if not 0 <= compression.id < 256:
+        raise CodecError(f"Compression id must fit in one byte, got {compression.id}")
+    COMPRESSIONS[compression.id] = compression
+    return compression
+
+
+def get_compression(name: str) -> Compression:
+    for compression in COMPRESSIONS.values():
+        if compression.name == name:
+            return compression
+    raise CodecError(f"Unknown compression '{name}'")
+
+
+DEFAULT_CODEC = register_codec(MarshalCodec())
+NO_COMPRESSION = register_compression(NoCompression())
+register_compression(ZlibCompression())
+register_compression(LzmaCompression())
+DEFAULT_COMPRESSION = get_compression(COMPRESSION)
+
+
+def encode(
+    value,
+    codec: Codec | None = None,
+    compression: Compression | None = None,
+    threshold: int | None = None,
+) -> bytes:
+    codec = codec or DEFAULT_CODEC
+    compression = compression or DEFAULT_COMPRESSION
+    threshold = COMPRESSION_THRESHOLD if threshold is None else threshold
+    try:
+        payload = codec.dumps(value)
+    except ValueError as ex:
+        raise CodecError(f"{codec.name} cannot encode {type(value).__name__}: {ex}") from ex
+    if compression is not NO_COMPRESSION and len(payload) >= threshold:
+        compressed = compression.compress(payload)
+        if len(compressed) < len(payload):
+            return MAGIC + bytes((FORMAT_VERSION, codec.id, compression.id)) + compressed
+    return MAGIC + bytes((FORMAT_VERSION, codec.id, NO_COMPRESSION.id)) + payload
+
+
+def decode(data: bytes):
+    if data[:2] != MAGIC or len(data) < 4:
+        raise CodecError("Not an encoded value")
+    version, codec_id = data[2], data[3]
+    header_size = HEADER_SIZES.get(version)
+    if header_size is None or len(data) < header_size:
+        raise CodecError(f"Unsupported value format version {version}")
+    codec = CODECS.get(codec_id)
+    if codec is None:
+        raise CodecError(f"Unknown codec id {codec_id}")
+    payload = memoryview(data)[header_size:]
+    if version >= 2 and data[4] != NO_COMPRESSION.id:
+        compression = COMPRESSIONS.get(data[4])
+        if compression is None:
+            raise CodecError(f"Unknown compression id {data[4]}")
+        payload = compression.decompress(payload)
+    return codec.loads(payload)
@@ -1,6 +1,17 @@
-import os, json, shutil, ast
+import os, json, shutil, ast, stat, threading, marshal, time, hashlib
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
 from fs.osfs import OSFS
-from typing import Union, List, Optional
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, Union, List, Optional
+
+from . import _codec, _iostats
+from ._ram import Ram, RamRegion  # re-exported for older imports
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
 
 PATH = str
 FS_PATH = str
@@ -11,7 +22,46 @@ DIRECTORY = "directory"
 FILE = "file"
 TYPE = str  # "directory" | "file"
 
-DB_PATH = "database/data"
+# Value file extensions, in resolution order. Strings are stored as
+# ".txt", everything else as ".bin" (see `_codec`); values whose encoding
+# reaches BLOB_THRESHOLD bytes go to the blob store and the tree keeps a
+# ".ref" holding their hash. ".py" literals are only read, for trees
+# written before the binary format existed.
+VALUE_EXTS = [".txt", ".bin", ".ref", ".py"]
+
+# Storage configuration, overridable from the environment:
+#   QUESTLY_DB_BACKEND = "fs" (one file per value) | "sqlite" (single file)
+DB_BACKEND = os.environ.get("QUESTLY_DB_BACKEND", "fs")
+DB_PATH = os.environ.get("QUESTLY_DB_PATH", "database/data")
+DB_SQLITE_PATH = os.environ.get("QUESTLY_DB_SQLITE_PATH", "database/data.sqlite3")
+# Collections stored as "<collection>/ab/cd/<key>" on the filesystem
+# backend, e.g. "users,games,hashes/games,hashes/users,hashes/collections".
+# Existing trees must be converted first: `python -m database._shard`.
+DB_SHARDED = [c for c in os.environ.get("QUESTLY_DB_SHARDED", "").split(",") if c]
+BLOB_THRESHOLD = int(os.environ.get("QUESTLY_BLOB_THRESHOLD", "4096"))
+# With QUESTLY_CONVERT_LEGACY=1 the bot rewrites legacy ".py" values in
+# the background at startup; `python -m database._disk` does it at once.
+CONVERT_LEGACY = os.environ.get("QUESTLY_CONVERT_LEGACY", "0") == "1"
+# Seconds a tree replaced by `Disk.staged` is kept for readers still
+# inside it before it is removed.
+STAGED_GC_GRACE = float(os.environ.get("QUESTLY_STAGED_GC_GRACE", "60"))
+
+# Resolved paths kept per Disk, existing or not, least recently used
+# first out.
+PATH_CACHE_MAX_ENTRIES = int(os.environ.get("QUESTLY_PATH_CACHE_MAX_ENTRIES", "65536"))
+# Value cache limits. With QUESTLY_VALUE_CACHE_CHECK_MTIME=1 every hit
+# costs one stat, so writes from other processes are noticed.
+VALUE_CACHE_MAX_ENTRIES = int(os.environ.get("QUESTLY_VALUE_CACHE_MAX_ENTRIES", "4096"))
+VALUE_CACHE_MAX_BYTES = int(os.environ.get("QUESTLY_VALUE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+VALUE_CACHE_CHECK_MTIME = os.environ.get("QUESTLY_VALUE_CACHE_CHECK_MTIME", "0") == "1"
+# Children read per directory-scan step in `File.iter_children`.
+SCAN_CHUNK = 256
+
+
+# Locking of Disk operations on overlapping paths:
+#   QUESTLY_DB_LOCKS = "thread" (within this process) | "process" (also
+#   across processes sharing the data directory, via flock) | "none"
+DB_LOCKS = os.environ.get("QUESTLY_DB_LOCKS", "thread")
 
 
 from datetime import datetime
@@ -30,7 +80,381 @@ def get_current_time_info() -> dict[str, str | float | int]:
     }
 
 def update_versions(disk: "Disk", file: "File"):
-    pass
+    """
+    Records the blob reference `file` currently holds in its revision
+    history before the file is changed or deleted. Blobs are immutable,
+    so a revision costs one hash, and identical consecutive revisions
+    are stored once.
+    """
+    ref = disk._read_ref(file.fs_path)
+    if ref is not None:
+        disk._record_version(file.fs_path, ref)
+
+
+def shard_prefix(key: str) -> List[str]:
+    """
+    The two directory levels a sharded collection puts `key` under.
+    """
+    digest = hashlib.md5(key.encode("utf-8")).hexdigest()
+    return [digest[:2], digest[2:4]]
+
+
+# -----------------------------
+# Path cache
+# -----------------------------
+class PathCache:
+    """
+    Maps fs paths to their resolved `(fs_path_ext, type)`, for up to
+    `max_entries` paths, least recently used first out.
+
+    The Disk keeps it exact for its own writes: `set_value`, `mkdir`,
+    `delete_data` and `clear` update or drop the affected entries, so
+    a warm path never touches the filesystem again.
+
+    Without `cache_missing`, paths that do not exist are not cached, as
+    another process may create them at any time.
+    """
+    def __init__(self, root: FS_PATH, cache_missing: bool = True, max_entries: int = PATH_CACHE_MAX_ENTRIES):
+        self.root = root
+        self.cache_missing = cache_missing
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[FS_PATH, tuple[Optional[FS_PATH_EXT], Optional[TYPE]]] = OrderedDict()
+        # cached paths per parent, so a subtree is dropped without a scan
+        self._children: dict[FS_PATH, set[FS_PATH]] = {}
+
+    def get(self, fs_path: FS_PATH) -> Optional[tuple[Optional[FS_PATH_EXT], Optional[TYPE]]]:
+        with self._lock:
+            entry = self._entries.get(fs_path)
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(fs_path)
+                self.hits += 1
+            return entry
+
+    def set(self, fs_path: FS_PATH, fs_path_ext: Optional[FS_PATH_EXT], type: Optional[TYPE]):
+        with self._lock:
+            if type is None and not self.cache_missing:
+                self._drop(fs_path)
+                return
+            self._add(fs_path, (fs_path_ext, type))
+            if type is not None:
+                # Anything that exists lives in a directory, so the
+                # ancestors can be recorded without a stat of their own.
+                parent = os.path.dirname(fs_path)
+                while len(parent) > len(self.root):
+                    if self._entries.get(parent, (None, None))[1] == DIRECTORY:
+                        break
+                    self._add(parent, (parent, DIRECTORY))
+                    parent = os.path.dirname(parent)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._unlink(evicted)
+                self.evictions += 1
+
+    def _add(self, fs_path: FS_PATH, entry: tuple[Optional[FS_PATH_EXT], Optional[TYPE]]):
+        self._entries[fs_path] = entry
+        self._entries.move_to_end(fs_path)
+        self._children.setdefault(os.path.dirname(fs_path), set()).add(fs_path)
+
+    def _drop(self, fs_path: FS_PATH):
+        if self._entries.pop(fs_path, None) is not None:
+            self._unlink(fs_path)
+
+    def _unlink(self, fs_path: FS_PATH):
+        parent = os.path.dirname(fs_path)
+        siblings = self._children.get(parent)
+        if siblings is not None:
+            siblings.discard(fs_path)
+            if not siblings:
+                del self._children[parent]
+
+    def invalidate(self, fs_path: FS_PATH):
+        """
+        Drops `fs_path` and everything below it.
+        """
+        with self._lock:
+            self._unlink(fs_path)
+            stack = [fs_path]
+            while stack:
+                path = stack.pop()
+                self._entries.pop(path, None)
+                stack.extend(self._children.pop(path, ()))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._children.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+        }
+
+
+# -----------------------------
+# Value cache
+# -----------------------------
+class ValueCache:
+    """
+    Size-bounded LRU of decoded values, keyed by resolved path.
+
+    Immutable values are kept as they are; containers are kept marshalled
+    and rebuilt on every hit, so callers can never mutate a cached value.
+    Each invalidation bumps `generation`, letting a reader that raced
+    with a write drop its (possibly stale) result instead of caching it.
+    """
+    IMMUTABLE = (str, bytes, int, float, bool, type(None))
+
+    def __init__(
+        self,
+        max_entries: int = VALUE_CACHE_MAX_ENTRIES,
+        max_bytes: int = VALUE_CACHE_MAX_BYTES,
+        check_mtime: bool = VALUE_CACHE_CHECK_MTIME,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.check_mtime = check_mtime
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[FS_PATH_EXT, tuple[Any, bool, int, Optional[int]]] = OrderedDict()
+
+    def get(self, key: FS_PATH_EXT, stamp: Optional[int] = None) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[3] != stamp:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        value, packed, _, _ = entry
+        return True, marshal.loads(value) if packed else value
+
+    def put(self, key: FS_PATH_EXT, value, stamp: Optional[int] = None, generation: Optional[int] = None):
+        if isinstance(value, self.IMMUTABLE):
+            packed, size = False, len(value) if isinstance(value, (str, bytes)) else 64
+        else:
+            try:
+                value = marshal.dumps(value)
+            except ValueError:
+                return
+            packed, size = True, len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._drop(key)
+            self._entries[key] = (value, packed, size, stamp)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, _, evicted, _) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def _drop(self, key: FS_PATH_EXT):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def invalidate(self, fs_path: FS_PATH, subtree: bool = False):
+        """
+        Drops every cached extension of `fs_path`, and with `subtree`
+        everything below it as well.
+        """
+        with self._lock:
+            self.generation += 1
+            self._drop(fs_path)
+            for ext in VALUE_EXTS:
+                self._drop(fs_path + ext)
+            if subtree:
+                prefix = fs_path + os.sep
+                for key in [key for key in self._entries if key.startswith(prefix)]:
+                    self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+        }
+
+
+# -----------------------------
+# Locks
+# -----------------------------
+def _overlaps(a: PATH, b: PATH) -> bool:
+    return a == b or not a or not b or b.startswith(a + "/") or a.startswith(b + "/")
+
+
+class LockManager:
+    """
+    Hierarchical reader/writer locks on logical paths. A lock covers a
+    whole subtree, so it conflicts with locks on the path's ancestors
+    and descendants; only shared locks are compatible. Locks are
+    reentrant: a thread never waits on locks it already holds.
+
+        >>> with disk.locks.write("games/1:1"):
+        ...     ...
+
+    With `directory`, each thread's outermost lock also takes `flock`
+    locks on files there, so several processes can share a data
+    directory. Those are record-sized: paths are cut to their first two
+    segments ("games/1:1", "users/42"), the root and collection files
+    are held shared on the way down, and a collection lock excludes
+    writers of the collection itself, not of its records.
+
+    `on_write` is called with the locked path once such an exclusive
+    lock is held, e.g. to drop what the process cached of that subtree
+    before another process's writes.
+    """
+    def __init__(self, directory: Optional[str] = None):
+        if directory is not None and fcntl is None:
+            raise RuntimeError("Process-wide locks need fcntl")
+        self.directory = directory
+        self.depth_limit = 2 if directory is not None else None
+        self.waits = 0
+        self.on_write: Optional[Callable[[PATH], None]] = None
+        self._cond = threading.Condition()
+        self._held: dict[tuple[PATH, int, bool], int] = {}
+        self._writers_waiting: dict[PATH, int] = {}
+        self._local = threading.local()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    # Trees below these roots belong to the one thread building them (see
+    # `Disk.staged`); they are not flocked, which would leave a lock file
+    # behind per staged tree.
+    PRIVATE_ROOTS = (".staging",)
+
+    def key(self, path: PATH) -> PATH:
+        norm = os.path.normpath(path.strip("/")).replace(os.sep, "/")
+        parts = [] if norm == "." else norm.split("/")
+        return "/".join(parts[:self.depth_limit])
+
+    def read(self, path: PATH):
+        return self._lock(self.key(path), exclusive=False)
+
+    def write(self, path: PATH):
+        return self._lock(self.key(path), exclusive=True)
+
+    def _blocked(self, path: PATH, exclusive: bool, me: int, depth: int) -> bool:
+        for held, owner, held_exclusive in self._held:
+            if owner != me and (exclusive or held_exclusive) and _overlaps(held, path):
+                return True
+        # waiting writers go first, so a stream of readers cannot starve
+        # them; a thread that already holds locks may be what they wait on
+        return not exclusive and depth == 0 and any(_overlaps(w, path) for w in self._writers_waiting)
+
+    @contextmanager
+    def _lock(self, path: PATH, exclusive: bool):
+        me = threading.get_ident()
+        depth = getattr(self._local, "depth", 0)
+        entry = (path, me, exclusive)
+        with self._cond:
+            if self._blocked(path, exclusive, me, depth):
+                self.waits += 1
+                if exclusive:
+                    self._writers_waiting[path] = self._writers_waiting.get(path, 0) + 1
+                try:
+                    while self._blocked(path, exclusive, me, depth):
+                        self._cond.wait()
+                finally:
+                    if exclusive:
+                        self._writers_waiting[path] -= 1
+                        if not self._writers_waiting[path]:
+                            del self._writers_waiting[path]
+            self._held[entry] = self._held.get(entry, 0) + 1
+        self._local.depth = depth + 1
+        files: List[int] = []
+        try:
+            if self.directory is not None and depth == 0 and path.split("/")[0] not in self.PRIVATE_ROOTS:
+                files = self._lock_files(path, exclusive)
+                if exclusive and self.on_write is not None:
+                    self.on_write(path)
+            yield
+        finally:
+            for fd in reversed(files):
+                os.close(fd)
+            self._local.depth = depth
+            with self._cond:
+                count = self._held.pop(entry) - 1
+                if count:
+                    self._held[entry] = count
+                self._cond.notify_all()
+
+    def _lock_files(self, path: PATH, exclusive: bool) -> List[int]:
+        """
+        Takes the root, collection and record files in that order, the
+        last one in the requested mode. Closing the descriptors releases.
+        """
+        parts = path.split("/") if path else []
+        keys = [""] + ["/".join(parts[:i]) for i in range(1, len(parts) + 1)]
+        fds: List[int] = []
+        try:
+            for i, key in enumerate(keys):
+                name = hashlib.md5(key.encode("utf-8")).hexdigest() + ".lock"
+                fd = os.open(os.path.join(self.directory, name), os.O_RDWR | os.O_CREAT, 0o644)
+                fds.append(fd)
+                last = i == len(keys) - 1
+                fcntl.flock(fd, fcntl.LOCK_EX if exclusive and last else fcntl.LOCK_SH)
+        except BaseException:
+            for fd in fds:
+                os.close(fd)
+            raise
+        return fds
+
+    def stats(self) -> dict[str, int]:
+        with self._cond:
+            return {
+                "held": sum(self._held.values()),
+                "writers_waiting": sum(self._writers_waiting.values()),
+                "waits": self.waits,
+            }
+
+
+class NoLocks(LockManager):
+    def __init__(self):
+        super().__init__()
+
+    def read(self, path: PATH):
+        return nullcontext()
+
+    def write(self, path: PATH):
+        return nullcontext()
+
+
+def open_locks(mode: str, directory: str) -> LockManager:
+    """
+    The lock manager for a `DB_LOCKS` mode; `directory` holds the lock
+    files of the "process" mode.
+    """
+    if mode == "none":
+        return NoLocks()
+    if mode == "thread":
+        return LockManager()
+    if mode == "process":
+        return LockManager(directory)
+    raise ValueError(f"Unknown lock mode '{mode}'")
 
 
 # -----------------------------
@@ -151,9 +575,42 @@ class MetaData:
 
 
 class Meta:
+    """
+    Sidecar metadata of a File.
+
+    Nothing is read until the data is first accessed, and changes made
+    inside `with meta.batch():` are written once when the block exits.
+    """
     def __init__(self, file: "File"):
         self.file = file
-        self.data = self.file.disk._read_meta(self.file) or {}
+        self.dirty = False
+        self._data: Optional[dict] = None
+        self._batch_depth = 0
+
+    @property
+    def data(self) -> dict:
+        if self._data is None:
+            with self.file.disk.locks.read(self.file.path):
+                self._data = self.file.disk._read_meta(self.file) or {}
+        return self._data
+
+    @data.setter
+    def data(self, value: dict):
+        self._data = value
+
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    @contextmanager
+    def batch(self):
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.flush()
 
     def all(self) -> dict:
         return self.data
@@ -179,8 +636,17 @@ class Meta:
         self.save()
 
     def save(self):
-        update_versions(self.file.disk, self.file)
-        self.file.disk._write_meta(self.file, self.data)
+        self.dirty = True
+        if self._batch_depth == 0:
+            self.flush()
+
+    def flush(self):
+        if not self.dirty:
+            return
+        with self.file.disk.locks.write(self.file.path):
+            update_versions(self.file.disk, self.file)
+            self.file.disk._write_meta(self.file, self.data)
+        self.dirty = False
 
 
 # -----------------------------
@@ -191,8 +657,21 @@ class File:
         self.disk = disk
         self.path = path
         self.fs_path = disk._fs_path(path)
-        self.fs_path_ext = disk._resolve_path(self.fs_path)
-        self.meta = Meta(self)
+        self._meta: Optional[Meta] = None
+
+    @property
+    def meta(self) -> Meta:
+        if self._meta is None:
+            self._meta = Meta(self)
+        return self._meta
+
+    @meta.setter
+    def meta(self, meta: Optional[Meta]):
+        self._meta = meta
+
+    @property
+    def fs_path_ext(self) -> Optional[FS_PATH_EXT]:
+        return self.disk._resolve(self.fs_path)[0]
 
     @property
     def name(self) -> str:
@@ -204,20 +683,16 @@ class File:
     
     @property
     def type(self) -> Optional[TYPE]:
-        if self.is_directory():
-            return DIRECTORY
-        if self.is_file():
-            return FILE
-        return None
+        return self.disk._resolve(self.fs_path)[1]
 
     def exists(self) -> bool:
-        return self.fs_path_ext is not None and os.path.exists(self.fs_path_ext)
+        return self.type is not None
 
     def is_file(self) -> bool:
-        return bool(self.fs_path_ext) and os.path.isfile(self.fs_path_ext)
+        return self.type == FILE
 
     def is_directory(self) -> bool:
-        return bool(self.fs_path_ext) and os.path.isdir(self.fs_path_ext)
+        return self.type == DIRECTORY
 
     @property
     def value(self):
@@ -227,14 +702,9 @@ class File:
         return self.meta.all()
 
     def get(self, subpath: str) -> "File":
-        if self.exists() and self.is_file():
-            saved_meta = self.meta.all() or {}
-            self.disk.delete_data(self.path, delete_meta=True)
-            os.makedirs(self.fs_path, exist_ok=True)
-            self.fs_path_ext = self.fs_path
-            self.meta = Meta(self)
-            if saved_meta:
-                self.meta.set(saved_meta)
+        # A file that gains children is turned into a directory by the
+        # writes that create them (see `Disk._ensure_parents`), so reads
+        # never need to stat the intermediate segments.
         new_path = os.path.join(self.path, subpath)
         return File(self.disk, new_path)
 
@@ -245,107 +715,174 @@ class File:
         if not self.exists() or self.is_file():
             return
             yield
-        for name in os.listdir(self.fs_path_ext):
-            if name == ".DS_Store" or name.endswith(".meta.json"):
-                continue
-            base, _ = os.path.splitext(name)
+        for base in self.disk._child_names(str(self.fs_path_ext)):
             yield self.get(base)
 
     def __iter__(self):
         yield from self.all()
 
+    def iter_children(
+        self,
+        values: bool = True,
+        project: Optional[Callable[[Any], Any]] = None,
+        batch_size: Optional[int] = None,
+    ) -> Iterator:
+        """
+        Yields `(name, type, value)` for every child in one directory scan,
+        without building a File per child. Directories get `None` as value,
+        and so do files when `values` is false. `project` is applied to each
+        file value as it is read. With `batch_size`, yields lists of up to
+        that many tuples instead.
+        """
+        children = self._scan_locked(values)
+        if project is not None:
+            children = (
+                (name, type, project(value) if type == FILE else value)
+                for name, type, value in children
+            )
+        if not batch_size:
+            yield from children
+            return
+        while batch := list(islice(children, batch_size)):
+            yield batch
+
+    def _scan_locked(self, values: bool) -> Iterator[tuple[str, TYPE, Any]]:
+        # The shared lock is held while each chunk is read, never while
+        # the caller runs, so callers may write between chunks.
+        with self.disk.locks.read(self.path):
+            fs_path_ext, type = self.disk._resolve(self.fs_path)
+            if fs_path_ext is None or type != DIRECTORY:
+                return
+            scan = self.disk._scan(fs_path_ext, values)
+            chunk = list(islice(scan, SCAN_CHUNK))
+        while chunk:
+            yield from chunk
+            with self.disk.locks.read(self.path):
+                chunk = list(islice(scan, SCAN_CHUNK))
+
+    def read_children(
+        self,
+        values: bool = True,
+        project: Optional[Callable[[Any], Any]] = None,
+    ) -> List[tuple[str, TYPE, Any]]:
+        return list(self.iter_children(values, project))
+
     def name_value(self):
-        for f in self.all():
-            yield (f.name, f.get_value())
+        for name, type, value in self.iter_children():
+            if type == DIRECTORY:
+                value = self.get(name).get_value()
+            yield (name, value)
 
     def names(self):
-        for f in self.all():
-            yield f.name
+        for name, _, _ in self.iter_children(values=False):
+            yield name
 
     def listdir(self) -> List["File"]:
         return [f for f in self.all()]
 
     def get_value(self, default=None):
-        if not self.exists():
-            return default
-        if self.is_directory():
-            return {f: self.get(f).type for f in os.listdir(self.fs_path_ext) if f != ".DS_Store"}
-        if self.fs_path_ext.endswith(".py"):
-            try:
-                with open(self.fs_path_ext, "r", encoding="utf-8") as f:
-                    return ast.literal_eval(f.read())
-            except Exception:
-                return default
         try:
-            with open(self.fs_path_ext, "r", encoding="utf-8") as f:
-                return f.read()
+            return self.get_value_no_default()
         except Exception:
             return default
         
     def get_value_no_default(self):
-        if not self.exists():
-            raise Exception()
-        if self.is_directory():
-            return {f: self.get(f).type for f in os.listdir(self.fs_path_ext) if f != ".DS_Store"}
-        if self.fs_path_ext.endswith(".py"):
-            try:
-                with open(self.fs_path_ext, "r", encoding="utf-8") as f:
-                    return ast.literal_eval(f.read())
-            except Exception:
+        with self.disk.locks.read(self.path):
+            fs_path_ext, type = self.disk._resolve(self.fs_path)
+            if fs_path_ext is None:
                 raise Exception()
-        try:
-            with open(self.fs_path_ext, "r", encoding="utf-8") as f:
-                return f.read()
-        except Exception:
-            raise Exception()
+            if type == DIRECTORY:
+                return self.disk._list_types(fs_path_ext)
+            return self.disk._read_cached(fs_path_ext)
 
     def set_value(self, value):
         if self.disk._is_protected(self.path):
             raise PermissionError(f"Path '{self.path}' is protected and cannot be modified")
-        saved_meta = self.meta.all() or {}
-        if self.exists() and self.is_directory():
-            shutil.rmtree(str(self.fs_path_ext))
-        os.makedirs(os.path.dirname(self.fs_path), exist_ok=True)
-        is_py = not isinstance(value, str)
-        new_fs_path_ext = self.fs_path + (".py" if is_py else ".txt")
-        for ext in [".txt", ".py"]:
-            alt = self.fs_path + ext
-            if alt != new_fs_path_ext and os.path.exists(alt):
-                os.remove(alt)
-        with open(new_fs_path_ext, "w", encoding="utf-8") as f:
-            if new_fs_path_ext.endswith(".py"):
-                f.write(str(value))
-            else:
-                f.write(str(value))
-        self.fs_path_ext = new_fs_path_ext
-        self.meta = Meta(self)
-        if saved_meta:
-            self.meta.set(saved_meta)
-        else:
-            self.meta.save()
+        with self.disk.locks.write(self.path):
+            return self._set_value(value)
+
+    def _set_value(self, value):
+        # Files keep their sidecar across .txt/.py changes, so meta
+        # only has to be carried over when a directory is replaced.
+        was_directory = self.is_directory()
+        saved_meta = {}
+        if was_directory:
+            saved_meta = self.meta.all() or {}
+            self.disk._remove(str(self.fs_path_ext), DIRECTORY, delete_meta=True)
+            self.disk._forget(self.fs_path, subtree=True)
+        self.disk._ensure_parents(self.path)
+        new_fs_path_ext = self.disk._write_value(self.fs_path, value)
+        self.disk.values.invalidate(self.fs_path)
+        self.disk.paths.set(self.fs_path, new_fs_path_ext, FILE)
+        if was_directory:
+            self.meta = None
+            if saved_meta:
+                self.meta.set(saved_meta)
         return self
     
+    def versions(self) -> List[dict]:
+        """
+        Blob references this path has held, oldest first.
+        """
+        return [{"timestamp": ts, "ref": ref} for ts, ref in self.disk._versions(self.fs_path)]
+
+    def get_version(self, ref: str, default=None):
+        try:
+            return _codec.decode(self.disk._get_blob(ref))
+        except Exception:
+            return default
+
+    def increment(self, step: int = 1, start: Optional[Callable[[], int]] = None) -> int:
+        """
+        Adds `step` to the integer stored here and returns the result,
+        durably and atomically for every writer sharing this Disk's locks
+        (across processes with QUESTLY_DB_LOCKS=process). A missing value
+        counts from `start()`, or 0.
+        """
+        with self.disk.locks.write(self.path):
+            # read past the caches: the lock makes the stored value the
+            # latest one, a cached copy may predate another process's write
+            self.disk._forget(self.fs_path)
+            fs_path_ext, type = self.disk._resolve(self.fs_path)
+            try:
+                value = self.disk._read_value(fs_path_ext) if type == FILE else None
+            except Exception:
+                value = None
+            if not isinstance(value, int) or isinstance(value, bool):
+                value = start() if start is not None else 0
+            value += step
+            self.set_value(value)
+            self.disk._sync(str(self.fs_path_ext))
+            return value
+
     def push_value(self, push):
-        value = self.get_value()
-        if not isinstance(value, str):
-            value = ""
-        self.set_value(value + str(push))
+        with self.disk.locks.write(self.path):
+            value = self.get_value()
+            if not isinstance(value, str):
+                value = ""
+            self.set_value(value + str(push))
     
     def delete(self, delete_meta: bool = True):
         if self.disk._is_protected(self.path):
             raise PermissionError(f"Path '{self.path}' is protected and cannot be deleted!")
-        if self.exists():
-            self.disk.delete_data(self.path, delete_meta=delete_meta)
+        with self.disk.locks.write(self.path):
+            if self.exists():
+                self.disk.delete_data(self.path, delete_meta=delete_meta)
         return self
 
     def mkdir(self, children: Optional[List[Union[ExtractedFile, "File"]]] = None):
         if self.disk._is_protected(self.path):
             raise PermissionError(f"Path '{self.path}' is protected and cannot be modified")
+        with self.disk.locks.write(self.path):
+            return self._mkdir(children)
+
+    def _mkdir(self, children: Optional[List[Union[ExtractedFile, "File"]]]):
         if self.exists() and self.is_file():
-            os.remove(self.fs_path_ext)
-        os.makedirs(self.fs_path, exist_ok=True)
-        self.fs_path_ext = self.fs_path
-        self.meta = Meta(self)
+            self.disk._remove(str(self.fs_path_ext), FILE, delete_meta=False)
+            self.disk._forget(self.fs_path)
+            self.meta = None
+        self.disk._ensure_parents(self.path)
+        self.disk.paths.set(self.fs_path, self.disk._make_dir(self.fs_path), DIRECTORY)
         if children:
             for ch in children:
                 if isinstance(ch, ExtractedFile):
@@ -365,21 +902,24 @@ class File:
     def mkfile(self, data: dict):
         if self.disk._is_protected(self.path):
             raise PermissionError(f"Path '{self.path}' is protected and cannot be modified")
-        if self.exists():
-            self.disk.delete_data(self.path, delete_meta=True)
-        self.set_value(data.get("value", ""))
-        if "meta" in data:
-            self.meta.set(data["meta"])
+        with self.disk.locks.write(self.path):
+            if self.exists():
+                self.disk.delete_data(self.path, delete_meta=True)
+            self.set_value(data.get("value", ""))
+            if "meta" in data:
+                self.meta.set(data["meta"])
         return self
 
     def extract(self) -> Optional[ExtractedFile]:
+        with self.disk.locks.read(self.path):
+            return self._extract()
+
+    def _extract(self) -> Optional[ExtractedFile]:
         if self.is_file():
             return ExtractedFile(name=self.name, type=FILE, value=self.get_value(), meta=self.meta.all())
         if self.is_directory():
             children = []
-            for ch in os.listdir(self.fs_path_ext):
-                if ch == ".DS_Store":
-                    continue
+            for ch in self.disk._child_names(str(self.fs_path_ext)):
                 children.append(self.get(ch).extract())
             return ExtractedFile(name=self.name, type=DIRECTORY, meta=self.meta.all(), children=children)
         return None
@@ -387,7 +927,12 @@ class File:
     def set(self, other: Union["File", ExtractedFile]):
         if self.disk._is_protected(self.path):
             raise PermissionError(f"Path '{self.path}' is protected and cannot be modified")
-        if isinstance(other, ExtractedFile):
+        if isinstance(other, File):
+            extracted = other.extract()
+            if extracted:
+                self.set(extracted)
+            return self
+        with self.disk.locks.write(self.path):
             if other.type == FILE:
                 self.mkfile({"value": other.value, "meta": other.meta})
             else:
@@ -396,10 +941,6 @@ class File:
                     self.get(child.name).set(child)
                 if other.meta:
                     self.meta.set(other.meta)
-        elif isinstance(other, File):
-            extracted = other.extract()
-            if extracted:
-                self.set(extracted)
         return self
     
     def boolean(self, default: bool=False, update: bool=False) -> bool:
@@ -419,19 +960,21 @@ class File:
         if self.disk._is_protected(self.path):
             raise PermissionError(f"Path '{self.path}' is protected and cannot be modified")
 
-        # If path exists
-        if self.exists():
-            if self.is_directory():
-                # Clear all contents inside the folder
-                for file in self:
-                    if file.name not in ignore:
-                        file.delete()
-            else:
-                # Delete the file to replace with a folder
-                os.remove(str(self.fs_path_ext)) 
+        with self.disk.locks.write(self.path):
+            # If path exists
+            if self.exists():
+                if self.is_directory():
+                    # Clear all contents inside the folder
+                    for file in self:
+                        if file.name not in ignore:
+                            file.delete()
+                else:
+                    # Delete the file to replace with a folder
+                    self.disk._remove(str(self.fs_path_ext), FILE, delete_meta=False)
+                    self.disk._forget(self.fs_path)
 
-        # Ensure folder exists
-        self.mkdir()
+            # Ensure folder exists
+            self.mkdir()
         return self
 
 
@@ -439,22 +982,339 @@ class File:
 # Disk API
 # -----------------------------
 class Disk:
-    def __init__(self):
-        self.root = DB_PATH
+    """
+    Filesystem backend: one file per value under `root`.
+
+    Storage is reached only through the underscore primitives
+    (`_resolve`, `_read_value`, `_write_value`, `_make_dir`, `_remove`,
+    `_scan`, `_list_types`, `_read_meta`, `_write_meta`), which other
+    backends override while File keeps its semantics.
+
+    Logical paths never change; `sharded` collections are only laid out
+    as "<collection>/ab/cd/<key>" by the path mapper.
+
+    File operations lock their path through `locks` (see `LockManager`);
+    the primitives themselves never lock.
+    """
+    def __init__(self, root: str = DB_PATH, sharded: Iterable[str] = DB_SHARDED, locks: str = DB_LOCKS):
+        self.root = os.path.normpath(root)
         self.fs = OSFS(self.root, create=True)
+        # With process locks other processes write the same tree, so the
+        # caches are revalidated: missing paths are not cached, cached
+        # paths and values are checked against the file, and a write
+        # lock drops what is cached below the locked path.
+        self.shared = locks == "process"
+        self.paths = PathCache(self.root, cache_missing=not self.shared)
+        self.values = ValueCache(check_mtime=VALUE_CACHE_CHECK_MTIME or self.shared)
+        self.locks = open_locks(locks, os.path.join(self.root, ".locks"))
+        self.locks.on_write = self._revalidate
+        self.io = _iostats.IOStats(self.root)
+        self.sharded = {c.strip("/") for c in sharded}
+        self._shard_roots = {self._fs_path(c) for c in self.sharded}
 
     def _fs_path(self, path: PATH) -> FS_PATH:
-        return os.path.join(self.root, path.lstrip("/"))
+        path = os.path.normpath(path.strip("/"))
+        if self.sharded:
+            path = self._shard(path)
+        return os.path.normpath(os.path.join(self.root, path))
+
+    def _shard(self, path: PATH) -> PATH:
+        parts = path.split(os.sep)
+        for depth in (2, 1):
+            if len(parts) > depth and os.sep.join(parts[:depth]) in self.sharded:
+                return os.sep.join(parts[:depth] + shard_prefix(parts[depth]) + parts[depth:])
+        return path
+
+    def _shard_dirs(self, fs_path_ext: FS_PATH_EXT) -> Iterator[FS_PATH]:
+        """
+        Leaf directories of a sharded collection, or the directory itself.
+        """
+        if fs_path_ext not in self._shard_roots:
+            yield fs_path_ext
+            return
+        for first in sorted(self._listdir(fs_path_ext), key=lambda e: e.name):
+            if first.name.startswith(".") or not first.is_dir():
+                continue
+            for second in sorted(self._listdir(first.path), key=lambda e: e.name):
+                if not second.name.startswith(".") and second.is_dir():
+                    yield second.path
 
     def _resolve_path(self, fs_path: FS_PATH) -> Optional[FS_PATH_EXT]:
-        if os.path.exists(fs_path):
-            return fs_path
-        for ext in [".txt", ".py"]:
-            if os.path.exists(fs_path + ext):
-                return fs_path + ext
-        if os.path.isdir(fs_path):
-            return fs_path
-        return None
+        return self._resolve(fs_path)[0]
+
+    def _resolve(self, fs_path: FS_PATH) -> tuple[Optional[FS_PATH_EXT], Optional[TYPE]]:
+        cached = self.paths.get(fs_path)
+        if cached is not None:
+            if not self.shared or self._confirm(*cached):
+                return cached
+            self._forget(fs_path, subtree=True)
+        resolved: tuple[Optional[FS_PATH_EXT], Optional[TYPE]] = (None, None)
+        for candidate in [fs_path] + [fs_path + ext for ext in VALUE_EXTS]:
+            try:
+                st = self._stat(candidate)
+            except OSError:
+                continue
+            resolved = (candidate, DIRECTORY if stat.S_ISDIR(st.st_mode) else FILE)
+            break
+        self.paths.set(fs_path, *resolved)
+        return resolved
+
+    def _confirm(self, fs_path_ext: Optional[FS_PATH_EXT], type: Optional[TYPE]) -> bool:
+        """
+        Whether a cached resolution still holds, e.g. another process
+        did not rewrite a ".txt" value as ".bin".
+        """
+        try:
+            st = self._stat(fs_path_ext) # type: ignore
+        except (OSError, TypeError):
+            return False
+        return (DIRECTORY if stat.S_ISDIR(st.st_mode) else FILE) == type
+
+    def _revalidate(self, path: PATH):
+        if path:
+            self._forget(self._fs_path(path), subtree=True)
+        else:
+            self.paths.clear()
+            self.values.clear()
+
+    def _forget(self, fs_path: FS_PATH, subtree: bool = False):
+        """
+        Drops cached resolution and values after a removal.
+        """
+        self.paths.invalidate(fs_path)
+        self.values.invalidate(fs_path, subtree=subtree)
+
+    def _read_cached(self, fs_path_ext: FS_PATH_EXT):
+        stamp = self._stamp(fs_path_ext) if self.values.check_mtime else None
+        found, value = self.values.get(fs_path_ext, stamp)
+        if found:
+            return value
+        generation = self.values.generation
+        value = self._read_value(fs_path_ext)
+        self.values.put(fs_path_ext, value, stamp, generation)
+        return value
+
+    def _stamp(self, fs_path_ext: FS_PATH_EXT) -> Optional[int]:
+        try:
+            st = self._stat(fs_path_ext)
+        except OSError:
+            return None
+        # the size catches rewrites within the clock's granularity
+        return hash((st.st_mtime_ns, st.st_size))
+
+    # Filesystem calls of the primitives go through these helpers, so
+    # `io` (see `_iostats.IOStats`) sees every one of them.
+    def _stat(self, path: str) -> os.stat_result:
+        with self.io.measure("stat", path):
+            return os.stat(path)
+
+    def _exists(self, path: str) -> bool:
+        try:
+            self._stat(path)
+        except OSError:
+            return False
+        return True
+
+    def _listdir(self, directory: str) -> List[os.DirEntry]:
+        with self.io.measure("listdir", directory):
+            with os.scandir(directory) as entries:
+                return list(entries)
+
+    def _scandir(self, directory: str) -> Iterator[os.DirEntry]:
+        """
+        Like `_listdir`, but yields the entries while the directory is
+        read, so a huge collection is never held in memory. The time
+        spent reading the listing counts as one "listdir".
+        """
+        spent = 0.0
+        start = time.perf_counter()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    spent += time.perf_counter() - start
+                    yield entry
+                    start = time.perf_counter()
+                spent += time.perf_counter() - start
+        finally:
+            if self.io.enabled:
+                self.io.record("listdir", directory, spent)
+
+    def _read_file(self, path: str, encoding: Optional[str] = None):
+        """
+        The file's bytes, or its text when `encoding` is given.
+        """
+        with self.io.measure("open", path):
+            f = open(path, "r", encoding=encoding) if encoding else open(path, "rb")
+        with f, self.io.measure("read", path) as m:
+            data = f.read()
+            m.bytes = len(data)
+        return data
+
+    def _write_file(self, path: str, data, mode: str = "wb", encoding: Optional[str] = None):
+        with self.io.measure("open", path):
+            f = open(path, mode, encoding=encoding)
+        with f, self.io.measure("write", path) as m:
+            f.write(data)
+            m.bytes = len(data)
+
+    def _makedirs(self, directory: str):
+        with self.io.measure("mkdir", directory):
+            os.makedirs(directory, exist_ok=True)
+
+    def _rename(self, src: str, dst: str):
+        """
+        Atomically moves `src` to `dst`, replacing a file there.
+        """
+        with self.io.measure("rename", dst):
+            os.replace(src, dst)
+
+    def _symlink(self, target: str, link: str):
+        with self.io.measure("write", link):
+            os.symlink(target, link)
+
+    def _is_link(self, path: str) -> bool:
+        with self.io.measure("stat", path):
+            return os.path.islink(path)
+
+    def _remove_file(self, path: str):
+        with self.io.measure("remove", path):
+            os.remove(path)
+
+    def _rmtree(self, directory: str, ignore_errors: bool = False):
+        with self.io.measure("remove", directory):
+            shutil.rmtree(directory, ignore_errors=ignore_errors)
+
+    def cache_stats(self) -> dict[str, dict[str, int]]:
+        return {"paths": self.paths.stats(), "values": self.values.stats()}
+
+    def _ensure_parents(self, path: PATH):
+        """
+        Turns every file on the way to `path` into a directory,
+        carrying its meta over, so children can be created below it.
+        """
+        parts = [p for p in path.strip("/").split("/") if p not in ("", ".")]
+        for i in range(1, len(parts)):
+            parent = self.get("/".join(parts[:i]))
+            if not parent.is_file():
+                continue
+            saved_meta = parent.meta.all() or {}
+            self.delete_data(parent.path, delete_meta=True)
+            self.paths.set(parent.fs_path, self._make_dir(parent.fs_path), DIRECTORY)
+            parent.meta = None
+            if saved_meta:
+                parent.meta.set(saved_meta)
+
+    # A staged directory is built under "<root>/.staging/<token>", moved to
+    # "<root>/.trees/<token>" and published by atomically replacing a
+    # relative symlink at its logical path, so readers see either the old
+    # tree or the new one, never a mix. Replaced trees wait in
+    # "<root>/.trash" until `collect_garbage` removes them.
+    @contextmanager
+    def staged(self, path: PATH) -> Iterator[File]:
+        """
+        Builds a new version of the directory at `path` and swaps it in
+        once the block exits without an exception:
+
+            >>> with disk.staged("games/1:1") as game:
+            ...     game["creator"].set_value("1")
+
+        Meta and revision history of the replaced tree are carried over.
+        """
+        if self._is_protected(path):
+            raise PermissionError(f"Path '{path}' is protected and cannot be modified")
+        token = f"{time.time_ns()}-{os.getpid()}-{threading.get_ident()}"
+        staging = self.get(f".staging/{token}").mkdir()
+        try:
+            yield staging
+            with self.locks.write(path):
+                self._publish(self._fs_path(path), staging.fs_path, token)
+        except BaseException:
+            self._rmtree(staging.fs_path, ignore_errors=True)
+            raise
+        finally:
+            self._forget(staging.fs_path, subtree=True)
+
+    def _publish(self, target: FS_PATH, built: FS_PATH, token: str):
+        fs_path_ext, type = self._resolve(target)
+        if type == FILE:
+            self._remove(fs_path_ext, FILE, delete_meta=False)
+        old = None
+        if self._is_link(target):
+            old = os.path.realpath(target)
+        elif type == DIRECTORY:
+            old = target
+        if old is not None:
+            self._carry_sidecars(old, built)
+
+        tree = os.path.join(self.root, ".trees", token)
+        self._makedirs(os.path.dirname(tree))
+        self._makedirs(os.path.dirname(target))
+        self._rename(built, tree)
+        if old == target:
+            # a plain directory cannot be replaced atomically; it is
+            # renamed aside right before the link takes its place, and
+            # every later swap is atomic
+            old = os.path.join(os.path.dirname(target), f".{os.path.basename(target)}.{token}.old")
+            self._rename(target, old)
+        link = os.path.join(os.path.dirname(target), f".{os.path.basename(target)}.{token}.link")
+        self._symlink(os.path.relpath(tree, os.path.dirname(target)), link)
+        self._rename(link, target)
+        if old is not None:
+            self._trash(old)
+
+        self._forget(target, subtree=True)
+        self.paths.set(target, target, DIRECTORY)
+        self.collect_garbage()
+
+    def _carry_sidecars(self, old: FS_PATH, new: FS_PATH):
+        """
+        Copies the dot-prefixed sidecars of `old` the new tree does not
+        have, merging revision histories.
+        """
+        built = {entry.name: entry.is_dir() for entry in self._listdir(new)}
+        for entry in self._listdir(old):
+            name = entry.name
+            src, dst = entry.path, os.path.join(new, name)
+            if name.startswith(".") and name.endswith(".versions"):
+                history = self._read_versions(src)
+                for version in self._read_versions(dst):
+                    if not history or history[-1][1] != version[1]:
+                        history.append(version)
+                self._write_file(dst, "".join(f"{ts:.3f} {ref}\n" for ts, ref in history), mode="w", encoding="ascii")
+            elif name.endswith(".meta.json"):
+                if name not in built:
+                    self._write_file(dst, self._read_file(src))
+            elif not name.startswith(".") and entry.is_dir() and built.get(name):
+                self._carry_sidecars(src, dst)
+
+    def _trash(self, tree: FS_PATH):
+        trash = os.path.join(self.root, ".trash")
+        self._makedirs(trash)
+        try:
+            self._rename(tree, os.path.join(trash, f"{time.time_ns()}-{os.path.basename(tree)}"))
+        except OSError:
+            # already moved by a concurrent swap of the same path
+            pass
+
+    def collect_garbage(self, grace: float = STAGED_GC_GRACE) -> int:
+        """
+        Removes replaced trees, and staging directories abandoned by a
+        crash, that are older than `grace` seconds. Returns how many.
+        """
+        removed = 0
+        deadline = time.time_ns() - int(grace * 1e9)
+        for bucket in (".trash", ".staging"):
+            directory = os.path.join(self.root, bucket)
+            try:
+                entries = self._listdir(directory)
+            except OSError:
+                continue
+            for entry in entries:
+                created, _, _ = entry.name.partition("-")
+                if created.isdigit() and int(created) < deadline:
+                    self._rmtree(entry.path, ignore_errors=True)
+                    removed += 1
+        return removed
 
     def _meta_path(self, fs_path_ext: FS_PATH_EXT, type: TYPE) -> str:
         if type == DIRECTORY:
@@ -495,28 +1355,248 @@ class Disk:
             raise PermissionError(f"Path '{path}' is protected and cannot be deleted")
     
         f = self.get(path)
-        update_versions(self, f)
-        if not f.exists():
+        with self.locks.write(path):
+            update_versions(self, f)
+            fs_path_ext, type = self._resolve(f.fs_path)
+            if fs_path_ext is None or type is None:
+                return
+            self._remove(fs_path_ext, type, delete_meta=delete_meta)
+            self._forget(f.fs_path, subtree=type == DIRECTORY)
+
+    def _encode_value(self, value) -> tuple[str, bytes]:
+        """
+        Returns the value's kind ("txt" | "bin" | "ref") and stored bytes,
+        moving large payloads into the blob store first. Strings long
+        enough to be worth compressing go through the codec as well.
+        """
+        if isinstance(value, str) and len(value) < _codec.COMPRESSION_THRESHOLD:
+            kind, data = "txt", value.encode("utf-8")
+        else:
+            kind, data = "bin", _codec.encode(value)
+        if len(data) < BLOB_THRESHOLD:
+            return kind, data
+        payload = data if kind == "bin" else _codec.encode(value)
+        digest = hashlib.sha256(payload).hexdigest()
+        self._put_blob(digest, payload)
+        return "ref", digest.encode("ascii")
+
+    def _decode_value(self, kind: str, data: bytes):
+        if kind == "txt":
+            return data.decode("utf-8")
+        if kind == "bin":
+            return _codec.decode(data)
+        if kind == "ref":
+            return _codec.decode(self._get_blob(data.decode("ascii")))
+        if kind == "py":
+            return ast.literal_eval(data.decode("utf-8"))
+        raise ValueError(f"Unknown value kind '{kind}'")
+
+    def _read_value(self, fs_path_ext: FS_PATH_EXT):
+        _, ext = os.path.splitext(fs_path_ext)
+        if ext in (".bin", ".ref"):
+            return self._decode_value(ext[1:], self._read_file(fs_path_ext))
+        text = self._read_file(fs_path_ext, encoding="utf-8")
+        if ext == ".py":
+            return ast.literal_eval(text)
+        return text
+
+    def _write_value(self, fs_path: FS_PATH, value) -> FS_PATH_EXT:
+        kind, data = self._encode_value(value)
+        new_fs_path_ext = f"{fs_path}.{kind}"
+        if kind == "ref":
+            ref = data.decode("ascii")
+            if self._read_ref(fs_path) == ref:
+                # same content as stored: nothing to rewrite
+                return new_fs_path_ext
+        self._makedirs(os.path.dirname(fs_path))
+        for ext in VALUE_EXTS:
+            alt = fs_path + ext
+            if alt != new_fs_path_ext and self._exists(alt):
+                self._remove_file(alt)
+        self._write_file(new_fs_path_ext, data)
+        if kind == "ref":
+            self._record_version(fs_path, ref)
+        return new_fs_path_ext
+
+    def _sync(self, fs_path_ext: FS_PATH_EXT):
+        """
+        Flushes a written value to stable storage.
+        """
+        fd = os.open(fs_path_ext, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _read_ref(self, fs_path: FS_PATH) -> Optional[str]:
+        try:
+            return self._read_file(fs_path + ".ref", encoding="ascii").strip()
+        except OSError:
+            return None
+
+    # Blobs live under "<root>/.blobs/ab/<sha256>", written once and
+    # never modified, so any number of refs and revisions can share one.
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, ".blobs", digest[:2], digest)
+
+    def _put_blob(self, digest: str, payload: bytes):
+        path = self._blob_path(digest)
+        if self._exists(path):
+            return
+        self._makedirs(os.path.dirname(path))
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self._write_file(tmp, payload)
+        self._rename(tmp, path)
+
+    def _get_blob(self, digest: str) -> bytes:
+        return self._read_file(self._blob_path(digest))
+
+    def _iter_blobs(self) -> Iterator[tuple[str, bytes]]:
+        try:
+            prefixes = self._listdir(os.path.join(self.root, ".blobs"))
+        except OSError:
+            return
+        for prefix in prefixes:
+            for entry in self._listdir(prefix.path):
+                if not entry.name.endswith(".tmp"):
+                    yield entry.name, self._get_blob(entry.name)
+
+    def _versions_path(self, fs_path: FS_PATH) -> str:
+        return os.path.join(os.path.dirname(fs_path), f".{os.path.basename(fs_path)}.versions")
+
+    def _versions(self, fs_path: FS_PATH) -> List[tuple[float, str]]:
+        return self._read_versions(self._versions_path(fs_path))
+
+    def _read_versions(self, path: str) -> List[tuple[float, str]]:
+        try:
+            lines = self._read_file(path, encoding="ascii").split()
+        except OSError:
+            return []
+        return [(float(lines[i]), lines[i + 1]) for i in range(0, len(lines) - 1, 2)]
+
+    def _record_version(self, fs_path: FS_PATH, ref: str):
+        history = self._versions(fs_path)
+        if history and history[-1][1] == ref:
             return
-        if f.is_directory():
-            shutil.rmtree(f.fs_path_ext)
-        elif f.is_file():
-            os.remove(f.fs_path_ext)
+        self._write_file(self._versions_path(fs_path), f"{time.time():.3f} {ref}\n", mode="a", encoding="ascii")
+
+    # Append-only logs live in "<root>/.logs/<name>.log", one record per
+    # line. Positions are byte offsets, so readers can pick up new tails.
+    def _log_path(self, name: str) -> str:
+        return os.path.join(self.root, ".logs", f"{name}.log")
+
+    def _append_log(self, name: str, records: List[str]):
+        path = self._log_path(name)
+        self._makedirs(os.path.dirname(path))
+        # one write call, so concurrent appenders never interleave
+        self._write_file(path, "".join(f"{record}\n" for record in records), mode="a", encoding="utf-8")
+
+    def _read_log(self, name: str, position: int = 0) -> tuple[List[str], int]:
+        """
+        Records appended since `position`, and the position after them.
+        """
+        path = self._log_path(name)
+        try:
+            with self.io.measure("read", path) as m, open(path, "rb") as f:
+                f.seek(position)
+                data = f.read()
+                m.bytes = len(data)
+        except OSError:
+            return [], position
+        # a record still being appended is left for the next read
+        end = data.rfind(b"\n") + 1
+        return data[:end].decode("utf-8").splitlines(), position + end
+
+    def _drop_log(self, name: str):
+        """
+        Deletes the log, e.g. once its records were folded into a snapshot.
+        """
+        try:
+            self._remove_file(self._log_path(name))
+        except FileNotFoundError:
+            pass
+
+    def _log_names(self) -> List[str]:
+        try:
+            entries = self._listdir(os.path.join(self.root, ".logs"))
+        except OSError:
+            return []
+        return [entry.name[:-len(".log")] for entry in entries if entry.name.endswith(".log")]
+
+    # Side files are derived data kept outside the value tree, e.g.
+    # memory-mapped indexes; `clear` removes them with everything else.
+    def _side_path(self, name: str) -> str:
+        return os.path.join(self.root, ".indexes", name)
+
+    def _is_legacy(self, fs_path_ext: FS_PATH_EXT) -> bool:
+        return fs_path_ext.endswith(".py")
+
+    def _make_dir(self, fs_path: FS_PATH) -> FS_PATH_EXT:
+        self._makedirs(fs_path)
+        return fs_path
+
+    def _remove(self, fs_path_ext: FS_PATH_EXT, type: TYPE, delete_meta: bool = True):
+        if type == DIRECTORY and self._is_link(fs_path_ext):
+            # published by `staged`: drop the link and the tree behind it
+            tree = os.path.realpath(fs_path_ext)
+            self._remove_file(fs_path_ext)
+            self._rmtree(tree)
+        elif type == DIRECTORY:
+            self._rmtree(fs_path_ext)
+        else:
+            self._remove_file(fs_path_ext)
         if delete_meta:
-            meta_path = self._meta_path(f.fs_path_ext, f.type)
-            if os.path.exists(meta_path):
-                os.remove(meta_path)
-        f.fs_path_ext = None
+            meta_path = self._meta_path(fs_path_ext, type)
+            if self._exists(meta_path):
+                self._remove_file(meta_path)
+
+    def _list_types(self, fs_path_ext: FS_PATH_EXT) -> dict[str, TYPE]:
+        """
+        Raw entry names of a directory with their types.
+        """
+        types: dict[str, TYPE] = {}
+        for directory in self._shard_dirs(fs_path_ext):
+            for entry in self._listdir(directory):
+                if entry.name != ".DS_Store":
+                    types[entry.name] = DIRECTORY if entry.is_dir() else FILE
+        return types
+
+    def _child_names(self, fs_path_ext: FS_PATH_EXT) -> List[str]:
+        return [name for name, _, _ in self._scan(fs_path_ext, values=False)]
+
+    def _scan(self, fs_path_ext: FS_PATH_EXT, values: bool) -> Iterator[tuple[str, TYPE, Any]]:
+        """
+        One `os.scandir` pass over a directory. Entry types come from the
+        directory listing itself, and every child is recorded in the path
+        cache, so follow-up lookups of the same children are free.
+        """
+        for directory in self._shard_dirs(fs_path_ext):
+            for entry in self._scandir(directory):
+                name = entry.name
+                # sidecars, blobs and other internals are dot-prefixed
+                if name.startswith("."):
+                    continue
+                type = DIRECTORY if entry.is_dir() else FILE
+                base, ext = os.path.splitext(name)
+                if type == DIRECTORY or ext not in VALUE_EXTS:
+                    base = name
+                self.paths.set(os.path.join(directory, base), entry.path, type)
+                value = None
+                if values and type == FILE:
+                    try:
+                        value = self._read_cached(entry.path)
+                    except Exception:
+                        value = None
+                yield base, type, value
 
     def _read_meta(self, file: File) -> dict:
-        if not file.fs_path_ext:
+        if not file.exists():
             return {}
         path = self._meta_path(file.fs_path_ext, file.type)
-        if not os.path.exists(path):
+        if not self._exists(path):
             return {}
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            return json.loads(self._read_file(path, encoding="utf-8"))
         except Exception:
             return {}
 
@@ -524,7 +1604,7 @@ class Disk:
         if self._is_protected(file.path):
             raise PermissionError(f"Path '{file.path}' is protected and cannot be deleted")
         
-        if not file.fs_path_ext:
+        if not file.exists():
             return
         
         # meta.update({"timestamp": get_current_time_info()})
@@ -533,9 +1613,9 @@ class Disk:
             return
         
         path = self._meta_path(file.fs_path_ext, file.type)
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(meta, f, ensure_ascii=False, indent=2)
+        self._makedirs(os.path.dirname(path))
+        data = json.dumps(meta, ensure_ascii=False, separators=(",", ":"))
+        self._write_file(path, data, mode="w", encoding="utf-8")
 
     def set_value(self, path: str, value) -> File:
         return self.get(path).set_value(value)
@@ -544,21 +1624,83 @@ class Disk:
         return self.get(path).get_value(default)
     
     def clear(self):
-        if os.path.exists(self.root):
-            shutil.rmtree(self.root)
-        os.makedirs(self.root, exist_ok=True)
-
-# -----------------------------
-# RAM
-# -----------------------------
-
-raw_ram = {}
-
-class Ram:
-    raw = raw_ram
-
-    def get(self, key: str, default=None):
-        return raw_ram.get(key, default)
-
-    def set(self, key, value):
-        raw_ram[key] = value
\ No newline at end of file
+        with self.locks.write(""):
+            self._makedirs(self.root)
+            # the lock files are held right now, by this and other processes
+            for entry in self._listdir(self.root):
+                if entry.path == self.locks.directory:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    self._rmtree(entry.path)
+                else:
+                    self._remove_file(entry.path)
+            self.paths.clear()
+            self.values.clear()
+
+
+def convert_legacy_values(disk: Disk, path: PATH = "") -> int:
+    """
+    Rewrites every legacy `.py` literal below `path` in the binary
+    format. Returns the number of converted values.
+    """
+    converted = 0
+    stack = [path]
+    while stack:
+        current = disk.get(stack.pop())
+        fs_path_ext, type = disk._resolve(current.fs_path)
+        if fs_path_ext is None:
+            continue
+        if type == DIRECTORY:
+            stack.extend(os.path.join(current.path, name) for name in disk._child_names(fs_path_ext))
+        elif disk._is_legacy(fs_path_ext):
+            with disk.locks.write(current.path):
+                # re-resolved under the lock: a handler may have
+                # rewritten the value since the scan
+                fs_path_ext, type = disk._resolve(current.fs_path)
+                if type != FILE or not disk._is_legacy(fs_path_ext):
+                    continue
+                try:
+                    value = disk._read_value(fs_path_ext)
+                except Exception:
+                    continue
+                new_fs_path_ext = disk._write_value(current.fs_path, value)
+                disk.values.invalidate(current.fs_path)
+                disk.paths.set(current.fs_path, new_fs_path_ext, FILE)
+            converted += 1
+    return converted
+
+
+def start_legacy_conversion(disk: Disk, path: PATH = "") -> threading.Thread:
+    """
+    Runs `convert_legacy_values` on a daemon thread.
+    """
+    thread = threading.Thread(
+        target=convert_legacy_values, args=(disk, path),
+        name="questly-legacy-values", daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+def open_disk(backend: Optional[str] = None) -> Disk:
+    """
+    Opens the configured storage backend (see `DB_BACKEND`).
+    """
+    backend = backend or DB_BACKEND
+    if backend == "fs":
+        return Disk(DB_PATH)
+    if backend == "sqlite":
+        from ._sqlite import SqliteDisk
+        return SqliteDisk(DB_SQLITE_PATH)
+    raise ValueError(f"Unknown storage backend '{backend}'")
+
+
+if __name__ == "__main__":
+    # python -m database._disk [path]
+    # Converts the configured backend's legacy values below `path`; while
+    # the bot runs, both need QUESTLY_DB_LOCKS=process.
+    import sys
+
+    path = sys.argv[1] if len(sys.argv) > 1 else ""
+    converted = convert_legacy_values(open_disk(), path)
+    print(f"Converted {converted} legacy values below '{path or '/'}'")
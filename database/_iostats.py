@@ -0,0 +1,177 @@
+import os, sys, threading, time
+
+# Off unless QUESTLY_IO_STATS=1; `disk.io.enable()` turns it on at runtime.
+IO_STATS = os.environ.get("QUESTLY_IO_STATS", "0") == "1"
+
+# Frames of these modules are storage internals; the first frame outside
+# them is reported as the caller.
+INTERNAL_MODULES = {
+    f"{__package__}._disk",
+    f"{__package__}._sqlite",
+    f"{__package__}._async",
+    f"{__package__}._iostats",
+    "contextlib",
+}
+
+# Power-of-two latency buckets in microseconds: bucket `i` counts calls
+# that took less than 2**i us, the last one everything slower.
+BUCKETS = 32
+
+
+# -----------------------------
+# Histogram
+# -----------------------------
+class Histogram:
+    __slots__ = ("count", "bytes", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.bytes = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * BUCKETS
+
+    def add(self, seconds: float, nbytes: int = 0):
+        self.count += 1
+        self.bytes += nbytes
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[min(int(seconds * 1e6).bit_length(), BUCKETS - 1)] += 1
+
+    def quantile(self, q: float) -> float:
+        """
+        Upper bound, in microseconds, of the bucket holding quantile `q`.
+        """
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return float(2 ** i)
+        return 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "bytes": self.bytes,
+            "total_ms": round(self.total * 1e3, 3),
+            "mean_us": round(self.total * 1e6 / self.count, 1) if self.count else 0.0,
+            "p50_us": self.quantile(0.5),
+            "p99_us": self.quantile(0.99),
+            "max_us": round(self.max * 1e6, 1),
+            "buckets": {f"<{2 ** i}us": n for i, n in enumerate(self.buckets) if n},
+        }
+
+
+# -----------------------------
+# I/O stats
+# -----------------------------
+class _Measure:
+    __slots__ = ("stats", "op", "path", "bytes", "start")
+
+    def __init__(self, stats: "IOStats", op: str, path: str):
+        self.stats = stats
+        self.op = op
+        self.path = path
+        self.bytes = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.record(self.op, self.path, time.perf_counter() - self.start, self.bytes)
+
+
+class _NoMeasure:
+    bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NO_MEASURE = _NoMeasure()
+
+
+class IOStats:
+    """
+    Counts and times storage calls ("stat", "open", "read", "write",
+    "listdir", "mkdir", "rename", "remove"), in total, per top-level logical path ("games", "users",
+    ...) and per caller outside the storage modules:
+
+        >>> disk.io.enable()
+        >>> Game("1:1")
+        >>> disk.io.snapshot()["callers"]["database.database:Game._load"]["stat"]["count"]
+
+    Disabled, `measure` returns a shared no-op, so each call site costs
+    one attribute check.
+    """
+    def __init__(self, root: str = "", enabled: bool = IO_STATS):
+        self.root = root
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.since = time.time()
+            self._ops: dict[str, Histogram] = {}
+            self._paths: dict[tuple[str, str], Histogram] = {}
+            self._callers: dict[tuple[str, str], Histogram] = {}
+
+    def measure(self, op: str, path: str):
+        if not self.enabled:
+            return _NO_MEASURE
+        return _Measure(self, op, path)
+
+    def record(self, op: str, path: str, seconds: float, nbytes: int = 0):
+        top = self._top(path)
+        caller = _caller()
+        with self._lock:
+            for table, key in ((self._ops, op), (self._paths, (top, op)), (self._callers, (caller, op))):
+                histogram = table.get(key)
+                if histogram is None:
+                    histogram = table[key] = Histogram()
+                histogram.add(seconds, nbytes)
+
+    def _top(self, path: str) -> str:
+        if self.root and path.startswith(self.root):
+            path = path[len(self.root):]
+        return path.lstrip("/").split("/", 1)[0] or "/"
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            paths: dict[str, dict] = {}
+            for (top, op), histogram in self._paths.items():
+                paths.setdefault(top, {})[op] = histogram.snapshot()
+            callers: dict[str, dict] = {}
+            for (caller, op), histogram in self._callers.items():
+                callers.setdefault(caller, {})[op] = histogram.snapshot()
+            return {
+                "enabled": self.enabled,
+                "since": self.since,
+                "ops": {op: histogram.snapshot() for op, histogram in self._ops.items()},
+                "paths": paths,
+                "callers": callers,
+            }
+
+
+def _caller() -> str:
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module not in INTERNAL_MODULES:
+            code = frame.f_code
+            return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+        frame = frame.f_back
+    return "?"
@@ -0,0 +1,163 @@
+import threading, time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+# Standard library only, so modules outside the storage layer (such as
+# `parsing`) can cache without opening a Disk.
+
+
+# -----------------------------
+# RAM
+# -----------------------------
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+        # set by `delete`/`clear`: the value may predate them, so it is
+        # handed to the waiters but not cached
+        self.stale = False
+
+
+class RamRegion:
+    """
+    One namespace of the in-process cache: LRU-bounded, with optional
+    per-entry TTL. `get_or_compute` is single-flight, so concurrent
+    misses on the same key from several handler threads compute once;
+    a `delete` of the key while it computes keeps the result out of
+    the cache and lets later callers compute afresh.
+    """
+    def __init__(self, name: str, max_size: int = 1024, ttl: Optional[float] = None):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.computes = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Any, tuple[Any, Optional[float]]] = OrderedDict()
+        self._flights: dict[Any, _Flight] = {}
+
+    def _lookup(self, key) -> tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+        value, expires = entry
+        if expires is not None and expires <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, value
+
+    def get(self, key, default=None):
+        with self._lock:
+            found, value = self._lookup(key)
+        return value if found else default
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def _store(self, key, value, ttl: Optional[float]):
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key) -> bool:
+        with self._lock:
+            flight = self._flights.pop(key, None)
+            if flight is not None:
+                flight.stale = True
+            return self._entries.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            for flight in self._flights.values():
+                flight.stale = True
+            self._flights.clear()
+            self._entries.clear()
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return self._lookup(key)[0]
+
+    def get_or_compute(self, key, compute: Callable[[], Any], ttl: Optional[float] = None):
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            self.computes += 1
+            flight.value = compute()
+            with self._lock:
+                if not flight.stale:
+                    self._store(key, flight.value, ttl)
+            return flight.value
+        except BaseException as ex:
+            flight.error = ex
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "computes": self.computes,
+            "entries": len(self._entries),
+        }
+
+
+class Ram:
+    """
+    Process-wide cache, split into named regions:
+
+        >>> games = Ram.region("games", max_size=512, ttl=60)
+        >>> games.get_or_compute(game_id, lambda: load(game_id))
+
+    `Ram().get` / `Ram().set` use the "default" region.
+    """
+    _regions: dict[str, RamRegion] = {}
+    _regions_lock = threading.Lock()
+
+    @classmethod
+    def region(cls, name: str, max_size: int = 1024, ttl: Optional[float] = None) -> RamRegion:
+        with cls._regions_lock:
+            region = cls._regions.get(name)
+            if region is None:
+                region = cls._regions[name] = RamRegion(name, max_size, ttl)
+            return region
+
+    @classmethod
+    def stats(cls) -> dict[str, dict[str, int]]:
+        return {name: region.stats() for name, region in list(cls._regions.items())}
+
+    def get(self, key: str, default=None):
+        return self.region("default").get(key, default)
+
+    def set(self, key, value):
+        self.region("default").set(key, value)
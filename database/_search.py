@@ -0,0 +1,375 @@
+import os, re, mmap, struct, threading
+from array import array
+from bisect import bisect_left
+from typing import Callable, Iterable, Iterator
+
+from ._disk import Disk
+
+# Words shorter than this many characters are not expanded as
+# prefixes, so one typed letter does not union half the index.
+MIN_PREFIX = 2
+# New documents are kept in memory and in the search log until this
+# many have gathered, then merged into a new segment file.
+SEARCH_DELTA = int(os.environ.get("QUESTLY_SEARCH_DELTA", "4096"))
+
+WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return WORD.findall(text.casefold())
+
+
+def tag_term(tag: str) -> str:
+    # "#" keeps tags apart from words; whitespace would split log records
+    return "#" + "_".join(tag.casefold().split())
+
+
+def document(*texts: str, tags: Iterable[str] = ()) -> set[str]:
+    """
+    The terms a game is found by: the words of `texts` and its tags,
+    which are also searchable as words.
+    """
+    terms: set[str] = set()
+    for text in texts:
+        terms.update(tokenize(text))
+    for tag in tags:
+        terms.add(tag_term(tag))
+        terms.update(tokenize(tag))
+    return terms
+
+
+# -----------------------------
+# Segment file
+# -----------------------------
+# One immutable, memory-mapped file of native-order uint32 arrays:
+#
+#     header            magic, games, terms, postings, generation
+#     game offsets      games + 1 entries into the game blob
+#     term offsets      terms + 1 entries into the term blob
+#     posting offsets   terms + 1 entries into postings
+#     postings          ascending game numbers, per term
+#     game blob         utf-8 game ids
+#     term blob         utf-8 terms, sorted by bytes
+#
+# Nothing is parsed when it is opened; lookups bisect the term offsets.
+
+MAGIC = b"QSX2"
+HEADER = struct.Struct("=4sIIIQ")
+
+
+class _Strings:
+    """
+    Sequence view of strings packed in `blob` at `offsets`.
+    """
+    def __init__(self, blob: memoryview, offsets: memoryview):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> bytes:
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]])
+
+
+class Segment:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.stat = os.fstat(f.fileno())
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, games, terms, postings, self.generation = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a search segment")
+
+        def uints(start: int, count: int) -> tuple[memoryview, int]:
+            end = start + 4 * count
+            return view[start:end].cast("I"), end
+
+        game_offsets, end = uints(HEADER.size, games + 1)
+        term_offsets, end = uints(end, terms + 1)
+        self.posting_offsets, end = uints(end, terms + 1)
+        self.postings, end = uints(end, postings)
+        self.games = _Strings(view[end:end + game_offsets[-1]], game_offsets)
+        end += game_offsets[-1]
+        self.terms = _Strings(view[end:end + term_offsets[-1]], term_offsets)
+
+    def postings_of(self, i: int) -> memoryview:
+        return self.postings[self.posting_offsets[i]:self.posting_offsets[i + 1]]
+
+    def find(self, term: str, prefix: bool = False) -> Iterator[int]:
+        """
+        Numbers of the terms equal to `term`, or starting with it.
+        """
+        key = term.encode()
+        i = bisect_left(self.terms, key)
+        while i < len(self.terms):
+            found = self.terms[i]
+            if found != key and not (prefix and found.startswith(key)):
+                return
+            yield i
+            i += 1
+
+    def documents(self) -> dict[str, set[str]]:
+        """
+        Inverts the postings back into terms per game id.
+        """
+        games = [game.decode() for game in self.games]
+        docs: dict[str, set[str]] = {game: set() for game in games}
+        for i in range(len(self.terms)):
+            term = self.terms[i].decode()
+            for game in self.postings_of(i):
+                docs[games[game]].add(term)
+        return docs
+
+    @staticmethod
+    def write(path: str, docs: dict[str, set[str]], generation: int):
+        games = sorted(docs)
+        postings: dict[bytes, list[int]] = {}
+        for number, game in enumerate(games):
+            for term in docs[game]:
+                postings.setdefault(term.encode(), []).append(number)
+        terms = sorted(postings)
+
+        def packed(parts: list[bytes]) -> tuple[array, bytes]:
+            offsets = array("I", [0])
+            for part in parts:
+                offsets.append(offsets[-1] + len(part))
+            return offsets, b"".join(parts)
+
+        game_offsets, game_blob = packed([game.encode() for game in games])
+        term_offsets, term_blob = packed(terms)
+        posting_offsets, flat = array("I", [0]), array("I")
+        for term in terms:
+            flat.extend(postings[term])
+            posting_offsets.append(len(flat))
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(games), len(terms), len(flat), generation))
+            for part in (game_offsets, term_offsets, posting_offsets, flat):
+                f.write(part.tobytes())
+            f.write(game_blob)
+            f.write(term_blob)
+        os.replace(tmp, path)
+
+
+# -----------------------------
+# Search index
+# -----------------------------
+class SearchIndex:
+    """
+    Inverted index from terms to game ids.
+
+    The bulk lives in a memory-mapped segment file, opened by `open` at
+    startup. Documents added later go to the log of the segment's
+    generation ("search.<generation>") and to an in-memory delta that
+    overrides the segment for their games; once `SEARCH_DELTA` of them
+    gathered, both are merged into a segment of the next generation and
+    the old log is dropped. Other processes' additions are picked up
+    from the log tail. Adding and merging hold the "indexes/search" lock.
+
+    `build` yields `(game_id, terms)` of every game; it makes the first
+    segment when there is none yet.
+    """
+    LOG = "search"
+    LOCK = "indexes/search"
+
+    def __init__(self, disk: Disk, build: Callable[[], Iterable[tuple[str, set[str]]]]):
+        self.disk = disk
+        self.build = build
+        self.path = disk._side_path("search.idx")
+        self._lock = threading.Lock()
+        self._segment: Segment | None = None
+        self._log = self.LOG
+        self._position = 0
+        self._docs: dict[str, set[str]] = {}
+        self._terms: dict[str, set[str]] = {}
+        self._sorted: list[str] = []
+
+    # state
+    def open(self):
+        """
+        Opens the segment, building it first if there is none, so that
+        the first search does not.
+        """
+        with self._lock:
+            self._refresh()
+
+    def _open(self):
+        try:
+            segment = Segment(self.path)
+        except (FileNotFoundError, ValueError):
+            # missing, or written by an older version
+            with self.disk.locks.write(self.LOCK):
+                try:
+                    segment = Segment(self.path)
+                except (FileNotFoundError, ValueError):
+                    segment = self._build()
+        # the old mapping goes away with its last view
+        self._segment = segment
+        self._log = f"{self.LOG}.{segment.generation}"
+        self._position = 0
+        self._docs.clear()
+        self._terms.clear()
+        self._sorted.clear()
+
+    def _refresh(self):
+        if self._segment is None:
+            self._open()
+        else:
+            # another process may have merged a newer segment in
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                stat = None
+            old = self._segment.stat
+            if stat is None or (stat.st_ino, stat.st_mtime_ns) != (old.st_ino, old.st_mtime_ns):
+                self._open()
+        records, self._position = self.disk._read_log(self._log, self._position)
+        for record in records:
+            game_id, _, terms = record.partition("\t")
+            self._remember(game_id, set(terms.split()))
+
+    def _remember(self, game_id: str, terms: set[str]):
+        for term in self._docs.pop(game_id, ()):
+            self._terms[term].discard(game_id)
+        self._docs[game_id] = terms
+        for term in terms:
+            games = self._terms.get(term)
+            if games is None:
+                games = self._terms[term] = set()
+                self._sorted.insert(bisect_left(self._sorted, term), term)
+            games.add(game_id)
+
+    def add(self, game_id: str, terms: set[str]):
+        """
+        Indexes the game under `terms`, replacing what it had.
+        """
+        with self._lock, self.disk.locks.write(self.LOCK):
+            # no merge can start meanwhile, so the log is the current one
+            self._refresh()
+            self.disk._append_log(self._log, [f"{game_id}\t{' '.join(sorted(terms))}"])
+            self._refresh()
+            if len(self._docs) >= SEARCH_DELTA:
+                self._merge()
+
+    def _merge(self):
+        assert self._segment is not None
+        docs = self._segment.documents()
+        docs.update(self._docs)
+        Segment.write(self.path, docs, self._segment.generation + 1)
+        self._open()
+        self._drop_logs(self._segment.generation)
+
+    def _build(self) -> Segment:
+        generations = [generation for _, generation in self._logs()]
+        generation = max(generations, default=0) + 1
+        Segment.write(self.path, dict(self.build()), generation)
+        # `build` read every game, so no logged record is needed anymore
+        self._drop_logs(generation)
+        return Segment(self.path)
+
+    def _logs(self) -> Iterator[tuple[str, int]]:
+        for name in self.disk._log_names():
+            prefix, _, generation = name.partition(".")
+            if prefix == self.LOG:
+                # the log of the first version had no generation
+                yield name, int(generation) if generation.isdigit() else 0
+
+    def _drop_logs(self, generation: int):
+        """
+        Drops the logs of segments older than `generation`.
+        """
+        for name, older in list(self._logs()):
+            if older < generation:
+                self.disk._drop_log(name)
+
+    def reload(self):
+        """
+        Drops the in-memory copy, e.g. after the Disk was cleared; the
+        segment is opened again, or built, on next use.
+        """
+        with self._lock:
+            self._segment = None
+
+    def rebuild(self):
+        """
+        Makes a new segment from `build`, e.g. after games changed
+        outside `Games.create`.
+        """
+        with self._lock, self.disk.locks.write(self.LOCK):
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._segment = None
+            self._refresh()
+
+    # lookup
+    def search(self, query: str, count: int = 20) -> list[str]:
+        """
+        Ids of games that have every word of `query`; the last word may
+        be unfinished and matches as a prefix. "#tag" matches a tag.
+        """
+        words = [tag_term(word[1:]) if word.startswith("#") else word for word in query.split()]
+        words = [term for word in words for term in ([word] if word.startswith("#") else tokenize(word))]
+        if not words:
+            return []
+        last = len(words) - 1
+        queries = [(word, i == last and len(word) >= MIN_PREFIX) for i, word in enumerate(words)]
+
+        with self._lock:
+            self._refresh()
+            segment = self._segment
+            assert segment is not None
+            found = []
+            for number in self._in_segment(segment, queries):
+                game_id = segment.games[number].decode()
+                # games added since the segment was written are found in the delta
+                if game_id not in self._docs:
+                    found.append(game_id)
+                    if len(found) == count:
+                        break
+            found.extend(self._in_delta(queries))
+        return sorted(found)[:count]
+
+    @staticmethod
+    def _in_segment(segment: Segment, queries: list[tuple[str, bool]]) -> Iterator[int]:
+        """
+        Numbers of the matching games, ascending, which is also the
+        order of their ids, so callers can stop after the first few.
+        """
+        matches = []
+        for word, prefix in queries:
+            terms = list(segment.find(word, prefix))
+            if not terms:
+                return
+            matches.append([segment.postings_of(i) for i in terms])
+        # the rarest word first, then cheap membership tests against the rest
+        matches.sort(key=lambda lists: sum(len(postings) for postings in lists))
+        candidates = sorted({game for postings in matches[0] for game in postings})
+        for game in candidates:
+            if all(any(_contains(postings, game) for postings in lists) for lists in matches[1:]):
+                yield game
+
+    def _in_delta(self, queries: list[tuple[str, bool]]) -> set[str]:
+        found: set[str] | None = None
+        for word, prefix in queries:
+            games: set[str] = set()
+            if prefix:
+                i = bisect_left(self._sorted, word)
+                while i < len(self._sorted) and self._sorted[i].startswith(word):
+                    games |= self._terms[self._sorted[i]]
+                    i += 1
+            else:
+                games = self._terms.get(word, set())
+            found = games if found is None else found & games
+            if not found:
+                return set()
+        return found or set()
+
+
+def _contains(postings: memoryview, game: int) -> bool:
+    i = bisect_left(postings, game)
+    return i < len(postings) and postings[i] == game
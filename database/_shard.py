@@ -0,0 +1,100 @@
+import os
+from typing import Iterable
+
+from ._disk import DB_PATH, DB_SHARDED, VALUE_EXTS, shard_prefix
+
+# Written into a collection once its entries live in "ab/cd/" shards.
+MARKER = ".sharded"
+
+DEFAULT_COLLECTIONS = ["users", "games", "hashes/games", "hashes/users", "hashes/collections"]
+
+
+def _key(directory: str, name: str) -> str:
+    """
+    The logical key an entry of a flat collection belongs to.
+    """
+    if name.startswith(".") and name.endswith(".meta.json"):
+        return name[1:-len(".meta.json")]
+    base, ext = os.path.splitext(name)
+    if ext in VALUE_EXTS and os.path.isfile(os.path.join(directory, name)):
+        return base
+    return name
+
+
+def _move(source: str, target: str):
+    """
+    Renames an entry. Directories published by `Disk.staged` are relative
+    symlinks, so those are re-created to point from their new location.
+    """
+    if os.path.islink(source):
+        tree = os.path.realpath(source)
+        os.symlink(os.path.relpath(tree, os.path.dirname(target)), target)
+        os.remove(source)
+    else:
+        os.rename(source, target)
+
+
+def shard_collection(directory: str) -> int:
+    """
+    Moves every entry of a flat collection into its shard directory.
+    Returns the number of moved entries.
+    """
+    marker = os.path.join(directory, MARKER)
+    if os.path.exists(marker):
+        return 0
+    os.makedirs(directory, exist_ok=True)
+    moved = 0
+    for name in os.listdir(directory):
+        if name in (".DS_Store", ".meta.json"):
+            continue
+        target = os.path.join(directory, *shard_prefix(_key(directory, name)))
+        os.makedirs(target, exist_ok=True)
+        _move(os.path.join(directory, name), os.path.join(target, name))
+        moved += 1
+    open(marker, "w").close()
+    return moved
+
+
+def unshard_collection(directory: str) -> int:
+    """
+    Moves every entry back out of its shard directory.
+    Returns the number of moved entries.
+    """
+    marker = os.path.join(directory, MARKER)
+    if not os.path.exists(marker):
+        return 0
+    moved = 0
+    for first in os.listdir(directory):
+        first_path = os.path.join(directory, first)
+        if first.startswith(".") or not os.path.isdir(first_path):
+            continue
+        for second in os.listdir(first_path):
+            second_path = os.path.join(first_path, second)
+            for name in os.listdir(second_path):
+                _move(os.path.join(second_path, name), os.path.join(directory, name))
+                moved += 1
+            os.rmdir(second_path)
+        os.rmdir(first_path)
+    os.remove(marker)
+    return moved
+
+
+def shard_tree(root: str = DB_PATH, collections: Iterable[str] = DEFAULT_COLLECTIONS, reverse: bool = False) -> int:
+    """
+    Converts the given collections of a filesystem tree to (or, with
+    `reverse`, back from) the sharded layout. Run it while the bot is
+    stopped, then start it with the same collections in QUESTLY_DB_SHARDED.
+    """
+    convert = unshard_collection if reverse else shard_collection
+    return sum(convert(os.path.join(root, c.strip("/"))) for c in collections)
+
+
+if __name__ == "__main__":
+    # python -m database._shard [--reverse] [collection ...]
+    import sys
+
+    args = sys.argv[1:]
+    reverse = "--reverse" in args
+    collections = [a for a in args if a != "--reverse"] or DB_SHARDED or DEFAULT_COLLECTIONS
+    moved = shard_tree(DB_PATH, collections, reverse=reverse)
+    print(f"Moved {moved} entries in {', '.join(collections)}")
@@ -0,0 +1,431 @@
+import os, ast, json, sqlite3, threading, time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from . import _codec, _iostats
+from ._disk import (
+    Disk, File, PathCache, ValueCache, open_locks,
+    DB_LOCKS, VALUE_CACHE_MAX_ENTRIES, PATH, FS_PATH, FS_PATH_EXT, TYPE, DIRECTORY, FILE,
+)
+
+
+# -----------------------------
+# Schema
+# -----------------------------
+# One row per node. `path` is the logical path ("games/<id>/info/name"),
+# the root directory is the empty path. `kind` mirrors the extension the
+# filesystem backend would use ("txt" | "bin" | "ref" | legacy "py"), so
+# values and migrations round-trip unchanged. Meta lives in its own table,
+# keyed like the sidecar files: a file and a directory at the same path do
+# not share it. `blobs`, `versions` and `logs` mirror ".blobs/", the
+# ".<name>.versions" sidecars and ".logs/".
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    path   TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    name   TEXT NOT NULL,
+    type   TEXT NOT NULL,
+    kind   TEXT,
+    value  BLOB
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS nodes_parent ON nodes(parent, name);
+CREATE TABLE IF NOT EXISTS meta (
+    path TEXT NOT NULL,
+    type TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (path, type)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS versions (
+    path      TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    ref       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS versions_path ON versions(path);
+CREATE TABLE IF NOT EXISTS logs (
+    name   TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS logs_name ON logs(name);
+INSERT OR IGNORE INTO nodes(path, parent, name, type) VALUES ('', '', '', 'directory');
+"""
+
+SELECT_TYPE = "SELECT type FROM nodes WHERE path = ?"
+SELECT_VALUE = "SELECT kind, value FROM nodes WHERE path = ? AND type = 'file'"
+SELECT_KIND = "SELECT kind FROM nodes WHERE path = ?"
+SELECT_REF = "SELECT value FROM nodes WHERE path = ? AND kind = 'ref'"
+INSERT_BLOB = "INSERT OR IGNORE INTO blobs(hash, data) VALUES (?, ?)"
+SELECT_BLOB = "SELECT data FROM blobs WHERE hash = ?"
+SELECT_VERSIONS = "SELECT timestamp, ref FROM versions WHERE path = ? ORDER BY rowid"
+SELECT_LAST_VERSION = "SELECT ref FROM versions WHERE path = ? ORDER BY rowid DESC LIMIT 1"
+INSERT_VERSION = "INSERT INTO versions(path, timestamp, ref) VALUES (?, ?, ?)"
+SELECT_CHILDREN = "SELECT name, type FROM nodes WHERE parent = ? AND path != '' ORDER BY name"
+SCAN_CHILDREN = "SELECT path, name, type, NULL, NULL FROM nodes WHERE parent = ? AND path != ''"
+SCAN_CHILDREN_VALUES = "SELECT path, name, type, kind, value FROM nodes WHERE parent = ? AND path != ''"
+UPSERT_FILE = (
+    "INSERT INTO nodes(path, parent, name, type, kind, value) VALUES (?, ?, ?, 'file', ?, ?) "
+    "ON CONFLICT(path) DO UPDATE SET type = 'file', kind = excluded.kind, value = excluded.value"
+)
+INSERT_DIR = "INSERT OR IGNORE INTO nodes(path, parent, name, type) VALUES (?, ?, ?, 'directory')"
+DELETE_NODE = "DELETE FROM nodes WHERE path = ?"
+# Descendants of "p" are exactly the keys in ["p/", "p0"): '0' follows '/'.
+DELETE_SUBTREE = "DELETE FROM nodes WHERE path >= ? || '/' AND path < ? || '0'"
+SELECT_META = "SELECT data FROM meta WHERE path = ? AND type = ?"
+UPSERT_META = (
+    "INSERT INTO meta(path, type, data) VALUES (?, ?, ?) "
+    "ON CONFLICT(path, type) DO UPDATE SET data = excluded.data"
+)
+DELETE_META = "DELETE FROM meta WHERE path = ? AND type = ?"
+INSERT_LOG = "INSERT INTO logs(name, record) VALUES (?, ?)"
+SELECT_LOG = "SELECT rowid, record FROM logs WHERE name = ? AND rowid > ? ORDER BY rowid"
+DELETE_LOG = "DELETE FROM logs WHERE name = ?"
+DELETE_META_SUBTREE = "DELETE FROM meta WHERE path >= ? || '/' AND path < ? || '0'"
+
+
+def _split(path: FS_PATH) -> tuple[str, str]:
+    parent, _, name = path.rpartition("/")
+    return parent, name
+
+
+# -----------------------------
+# SQLite Disk
+# -----------------------------
+class SqliteDisk(Disk):
+    """
+    Single-file backend with the same File/Meta semantics as `Disk`.
+
+    Every thread gets its own connection; statements are plain constants
+    so sqlite3's per-connection statement cache keeps them prepared.
+    """
+    def __init__(self, db_path: str, locks: str = DB_LOCKS):
+        self.db_path = db_path
+        self.root = ""
+        self.sharded = set()
+        # Rows carry no mtime to revalidate against, so with process
+        # locks every path is looked up and no value is cached.
+        self.shared = locks == "process"
+        self.paths = PathCache(self.root, cache_missing=not self.shared)
+        self.values = ValueCache(max_entries=0 if self.shared else VALUE_CACHE_MAX_ENTRIES)
+        self.locks = open_locks(locks, db_path + ".locks")
+        self.locks.on_write = self._revalidate
+        # queries are reported as the filesystem calls they replace
+        self.io = _iostats.IOStats()
+        self._local = threading.local()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn.executescript(SCHEMA)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None, cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+        """
+        Runs the block in a transaction on this thread's connection. Inside
+        an open transaction the block simply joins it, so `staged` can
+        group any number of primitive writes.
+        """
+        conn = self._conn
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    @contextmanager
+    def staged(self, path: PATH) -> Iterator[File]:
+        """
+        Same contract as `Disk.staged`: the directory is emptied and
+        rebuilt in one transaction, which other connections only see
+        once it commits.
+        """
+        if self._is_protected(path):
+            raise PermissionError(f"Path '{path}' is protected and cannot be modified")
+        target = self.get(path)
+        try:
+            with self.locks.write(path), self._transaction(immediate=True):
+                target.clear()
+                yield target
+        finally:
+            # a rollback leaves this process's caches ahead of the rows,
+            # and readers may have cached the old rows meanwhile
+            self._forget(target.fs_path, subtree=True)
+
+    def collect_garbage(self, grace: float = 0) -> int:
+        # replaced rows are gone once `staged` commits
+        return 0
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _fs_path(self, path: PATH) -> FS_PATH:
+        norm = os.path.normpath(path.strip("/")).replace(os.sep, "/")
+        return "" if norm == "." else norm
+
+    def _stamp(self, fs_path_ext: FS_PATH_EXT) -> Optional[int]:
+        # Rows carry no mtime; only this process's own writes invalidate,
+        # which is why process locks turn the caches off (see __init__).
+        return None
+
+    def _resolve(self, fs_path: FS_PATH) -> tuple[Optional[FS_PATH_EXT], Optional[TYPE]]:
+        cached = None if self.shared else self.paths.get(fs_path)
+        if cached is not None:
+            return cached
+        with self.io.measure("stat", fs_path):
+            row = self._conn.execute(SELECT_TYPE, (fs_path,)).fetchone()
+        resolved = (fs_path, row[0]) if row else (None, None)
+        self.paths.set(fs_path, *resolved)
+        return resolved
+
+    def _insert_parents(self, conn: sqlite3.Connection, fs_path: FS_PATH):
+        parent, _ = _split(fs_path)
+        rows = []
+        while parent:
+            rows.append((parent, *_split(parent)))
+            parent = _split(parent)[0]
+        conn.executemany(INSERT_DIR, rows)
+
+    def _read_value(self, fs_path_ext: FS_PATH_EXT):
+        with self.io.measure("read", fs_path_ext) as m:
+            row = self._conn.execute(SELECT_VALUE, (fs_path_ext,)).fetchone()
+            if row is None:
+                raise FileNotFoundError(fs_path_ext)
+            m.bytes = len(row[1] or "")
+        return self._decode(*row)
+
+    def _decode(self, kind: str, value):
+        if kind == "bin":
+            return _codec.decode(value)
+        if kind == "ref":
+            return _codec.decode(self._get_blob(value))
+        if kind == "py":
+            return ast.literal_eval(value)
+        return value
+
+    def _write_value(self, fs_path: FS_PATH, value) -> FS_PATH_EXT:
+        kind, data = self._encode_value(value)
+        stored = data.decode("utf-8") if kind in ("txt", "ref") else data
+        if kind == "ref" and self._read_ref(fs_path) == stored:
+            # same content as stored: nothing to rewrite
+            return fs_path
+        with self.io.measure("write", fs_path) as m, self._transaction() as conn:
+            self._insert_parents(conn, fs_path)
+            conn.execute(UPSERT_FILE, (fs_path, *_split(fs_path), kind, stored))
+            m.bytes = len(stored)
+        if kind == "ref":
+            self._record_version(fs_path, stored)
+        return fs_path
+
+    def _sync(self, fs_path_ext: FS_PATH_EXT):
+        # committed with the write; WAL makes it durable at checkpoint
+        pass
+
+    def _read_ref(self, fs_path: FS_PATH) -> Optional[str]:
+        with self.io.measure("read", fs_path):
+            row = self._conn.execute(SELECT_REF, (fs_path,)).fetchone()
+        return row[0] if row else None
+
+    def _put_blob(self, digest: str, payload: bytes):
+        with self.io.measure("write", ".blobs") as m:
+            self._conn.execute(INSERT_BLOB, (digest, payload))
+            m.bytes = len(payload)
+
+    def _get_blob(self, digest: str) -> bytes:
+        with self.io.measure("read", ".blobs") as m:
+            row = self._conn.execute(SELECT_BLOB, (digest,)).fetchone()
+            if row is None:
+                raise FileNotFoundError(digest)
+            m.bytes = len(row[0])
+        return row[0]
+
+    def _iter_blobs(self) -> Iterator[tuple[str, bytes]]:
+        yield from self._conn.execute("SELECT hash, data FROM blobs")
+
+    def _versions(self, fs_path: FS_PATH) -> list[tuple[float, str]]:
+        return self._conn.execute(SELECT_VERSIONS, (fs_path,)).fetchall()
+
+    def _record_version(self, fs_path: FS_PATH, ref: str):
+        last = self._conn.execute(SELECT_LAST_VERSION, (fs_path,)).fetchone()
+        if last is None or last[0] != ref:
+            self._conn.execute(INSERT_VERSION, (fs_path, round(time.time(), 3), ref))
+
+    def _append_log(self, name: str, records: list[str]):
+        with self._transaction() as conn:
+            conn.executemany(INSERT_LOG, [(name, record) for record in records])
+
+    def _read_log(self, name: str, position: int = 0) -> tuple[list[str], int]:
+        # positions are rowids
+        with self.io.measure("read", ".logs"):
+            rows = self._conn.execute(SELECT_LOG, (name, position)).fetchall()
+        if not rows:
+            return [], position
+        return [record for _, record in rows], rows[-1][0]
+
+    def _drop_log(self, name: str):
+        with self._transaction() as conn:
+            conn.execute(DELETE_LOG, (name,))
+
+    def _log_names(self) -> list[str]:
+        return [row[0] for row in self._conn.execute("SELECT DISTINCT name FROM logs")]
+
+    def _side_path(self, name: str) -> str:
+        return os.path.join(f"{self.db_path}.indexes", name)
+
+    def _is_legacy(self, fs_path_ext: FS_PATH_EXT) -> bool:
+        row = self._conn.execute(SELECT_KIND, (fs_path_ext,)).fetchone()
+        return bool(row) and row[0] == "py"
+
+    def _make_dir(self, fs_path: FS_PATH) -> FS_PATH_EXT:
+        with self._transaction() as conn:
+            self._insert_parents(conn, fs_path)
+            conn.execute(INSERT_DIR, (fs_path, *_split(fs_path)))
+        return fs_path
+
+    def _remove(self, fs_path_ext: FS_PATH_EXT, type: TYPE, delete_meta: bool = True):
+        with self._transaction() as conn:
+            if fs_path_ext == "":
+                conn.execute("DELETE FROM nodes WHERE path != ''")
+                conn.execute("DELETE FROM meta")
+                return
+            conn.execute(DELETE_NODE, (fs_path_ext,))
+            if type == DIRECTORY:
+                conn.execute(DELETE_SUBTREE, (fs_path_ext, fs_path_ext))
+                conn.execute(DELETE_META_SUBTREE, (fs_path_ext, fs_path_ext))
+                conn.execute(DELETE_META, (fs_path_ext, DIRECTORY))
+            elif delete_meta:
+                conn.execute(DELETE_META, (fs_path_ext, FILE))
+
+    def _list_types(self, fs_path_ext: FS_PATH_EXT) -> dict[str, TYPE]:
+        with self.io.measure("listdir", fs_path_ext):
+            return dict(self._conn.execute(SELECT_CHILDREN, (fs_path_ext,)).fetchall())
+
+    def _scan(self, fs_path_ext: FS_PATH_EXT, values: bool) -> Iterator[tuple[str, TYPE, Any]]:
+        with self.io.measure("listdir", fs_path_ext):
+            cursor = self._conn.execute(SCAN_CHILDREN_VALUES if values else SCAN_CHILDREN, (fs_path_ext,))
+        while rows := cursor.fetchmany(256):
+            for path, name, type, kind, value in rows:
+                self.paths.set(path, path, type)
+                if values and type == FILE:
+                    try:
+                        value = self._decode(kind, value)
+                    except Exception:
+                        value = None
+                yield name, type, value
+
+    def _read_meta(self, file: File) -> dict:
+        fs_path_ext, type = self._resolve(file.fs_path)
+        if fs_path_ext is None:
+            return {}
+        with self.io.measure("read", fs_path_ext):
+            row = self._conn.execute(SELECT_META, (fs_path_ext, type)).fetchone()
+        if row is None:
+            return {}
+        try:
+            return json.loads(row[0])
+        except Exception:
+            return {}
+
+    def _write_meta(self, file: File, meta: dict):
+        if self._is_protected(file.path):
+            raise PermissionError(f"Path '{file.path}' is protected and cannot be deleted")
+        fs_path_ext, type = self._resolve(file.fs_path)
+        if fs_path_ext is None or not meta:
+            return
+        data = json.dumps(meta, ensure_ascii=False, separators=(",", ":"))
+        with self.io.measure("write", fs_path_ext) as m:
+            self._conn.execute(UPSERT_META, (fs_path_ext, type, data))
+            m.bytes = len(data)
+
+    def clear(self):
+        with self.locks.write(""), self._transaction() as conn:
+            conn.execute("DELETE FROM nodes")
+            conn.execute("DELETE FROM meta")
+            conn.execute("DELETE FROM blobs")
+            conn.execute("DELETE FROM versions")
+            conn.execute("DELETE FROM logs")
+            self._rmtree(f"{self.db_path}.indexes", ignore_errors=True)
+        self._conn.executescript(SCHEMA)
+        self.paths.clear()
+        self.values.clear()
+
+
+# -----------------------------
+# Migration
+# -----------------------------
+def migrate(source: Disk, target: SqliteDisk) -> int:
+    """
+    Copies every value, meta record, blob, revision and log of `source`
+    into `target` in one transaction. Returns the number of nodes copied.
+    """
+    conn = target._conn
+    count = 0
+    with conn:
+        conn.execute("BEGIN")
+        conn.executemany(INSERT_BLOB, source._iter_blobs())
+        for name in source._log_names():
+            records, _ = source._read_log(name)
+            conn.executemany(INSERT_LOG, [(name, record) for record in records])
+        stack = [""]
+        while stack:
+            path = stack.pop()
+            src = source.get(path)
+            fs_path_ext, type = source._resolve(src.fs_path)
+            if fs_path_ext is None or type is None:
+                continue
+            key = target._fs_path(path)
+            if type == DIRECTORY:
+                if key:
+                    conn.execute(INSERT_DIR, (key, *_split(key)))
+                stack.extend(
+                    f"{path}/{name}" if path else name
+                    for name in source._child_names(fs_path_ext)
+                )
+            else:
+                _, ext = os.path.splitext(fs_path_ext)
+                if ext == ".bin":
+                    with open(fs_path_ext, "rb") as f:
+                        raw = f.read()
+                else:
+                    with open(fs_path_ext, "r", encoding="utf-8") as f:
+                        raw = f.read()
+                conn.execute(UPSERT_FILE, (key, *_split(key), ext.lstrip(".") or "txt", raw))
+                for timestamp, ref in source._versions(src.fs_path):
+                    conn.execute(INSERT_VERSION, (key, timestamp, ref))
+            meta = source._read_meta(src)
+            if meta:
+                data = json.dumps(meta, ensure_ascii=False, separators=(",", ":"))
+                conn.execute(UPSERT_META, (key, type, data))
+            count += 1
+    target.paths.clear()
+    target.values.clear()
+    return count
+
+
+if __name__ == "__main__":
+    # python -m database._sqlite [source_dir] [target.sqlite3]
+    import sys
+    from . import _disk
+
+    source_root = sys.argv[1] if len(sys.argv) > 1 else _disk.DB_PATH
+    target_path = sys.argv[2] if len(sys.argv) > 2 else _disk.DB_SQLITE_PATH
+    copied = migrate(Disk(source_root), SqliteDisk(target_path))
+    print(f"Migrated {copied} nodes from '{source_root}' to '{target_path}'")
@@ -1,10 +1,106 @@
-from . import _disk, hashing
+import atexit
+import base64
+import json
+import logging
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterable
 
-disk = _disk.Disk()
+from . import _async, _disk, _search, hashing
+
+# One Disk per data root keeps its path cache coherent with every writer.
+disk = hashing.disk
+
+# Memoized per-user game lists; own writes invalidate them, the TTL
+# bounds how long changes made by another process stay invisible.
+users_cache = _disk.Ram.region("users", max_size=1024, ttl=60)
+# Loaded Game objects by id; `Games.create` drops the one it replaces.
+games_cache = _disk.Ram.region("games", max_size=512, ttl=300)
+
+# Items per page of the paginated listings (`Users.page`, `User.game_page`).
+PAGE_SIZE = 8
+
+# Player progress is written behind: every PROGRESS_FLUSH_INTERVAL
+# seconds, or as soon as PROGRESS_FLUSH_COUNT players have unsaved moves.
+PROGRESS_FLUSH_INTERVAL = float(os.environ.get("QUESTLY_PROGRESS_FLUSH_INTERVAL", "5"))
+PROGRESS_FLUSH_COUNT = int(os.environ.get("QUESTLY_PROGRESS_FLUSH_COUNT", "256"))
+# Scenes of history kept per saved game, for "back" after resuming.
+PROGRESS_HISTORY = 64
+
+log = logging.getLogger(__name__)
 
 class DatabaseError(Exception):
     pass
 
+class InvalidCursor(DatabaseError):
+    pass
+
+class Page:
+    """
+    One page of an ordered listing. `next` and `prev` are opaque cursors
+    to the neighbouring pages, or None at either end.
+
+    Cursors hold the sort key of the item they continue from, not an
+    offset, so items added or removed elsewhere do not shift a page.
+    """
+    def __init__(self, items: list, next: str | None = None, prev: str | None = None):
+        self.items = items
+        self.next = next
+        self.prev = prev
+
+    @classmethod
+    def of(cls, keys: list, cursor: str | None = None, size: int = PAGE_SIZE) -> "Page":
+        """
+        The page of the sorted `keys` that `cursor` points at, the first
+        one without a cursor. Pages are only empty when `keys` is.
+        """
+        start, end = 0, min(size, len(keys))
+        if cursor is not None:
+            direction, key = cls._decode(cursor)
+            try:
+                if direction == "after":
+                    start = bisect_right(keys, key)
+                    end = min(start + size, len(keys))
+                else:
+                    end = bisect_left(keys, key)
+                    start = max(0, end - size)
+            except TypeError as ex:
+                # a key of another listing, or of no listing at all
+                raise InvalidCursor(cursor) from ex
+            # a cursor past either end, e.g. after the items it continued
+            # from were removed, shows the last or first page
+            if start >= end and start >= len(keys):
+                start, end = max(0, len(keys) - size), len(keys)
+            elif start >= end:
+                start, end = 0, min(size, len(keys))
+        return cls(
+            keys[start:end],
+            next=cls._encode("after", keys[end - 1]) if end < len(keys) else None,
+            prev=cls._encode("before", keys[start]) if start > 0 else None,
+        )
+
+    @staticmethod
+    def _encode(direction: str, key: tuple) -> str:
+        data = json.dumps([direction, *key], separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+    @staticmethod
+    def _decode(cursor: str) -> tuple[str, Any]:
+        try:
+            decoded = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        except ValueError as ex:
+            raise InvalidCursor(cursor) from ex
+        # valid JSON that is not what `_encode` writes, e.g. `null` or `5`
+        if not isinstance(decoded, list) or not decoded:
+            raise InvalidCursor(cursor)
+        direction, *key = decoded
+        if direction not in ("after", "before"):
+            raise InvalidCursor(cursor)
+        return direction, tuple(key)
+
 class Settings:
     settings = disk["settings"]
 
@@ -28,27 +124,20 @@ class Games:
         else:
             game_id: str = hashing.Ids.make_game_id(user_id)
 
-        # hashes/
-        #     collections/
-        #         CollectionHash = CollectionID
-                
-        #     games/
-        #         GameHash = GameID
-
-        #     users/
-        #         UserHash = UserID
-        
-        game_hash: str = hashing.hash_id(game_id)
-        hashing.games[game_hash].set_value(game_id)
+        # hashing.index (append-only log):
+        #     games       GameHash = GameID
+        #     users       UserHash = UserID
+        #     collections CollectionHash = CollectionID
 
-        user_hash: str = hashing.hash_id(user_id)
-        hashing.users[user_hash].set_value(user_id)
+        # only mappings it does not know yet are written
+        hashing.index.put("games", game_id)
+        hashing.index.put("users", user_id)
 
         # games/
         #     GameID/
         #         creator: UserID
 
-        #         data: dict
+        #         data: dict (without meta.src and scenes)
         #         source: str
         #         scenes: dict
 
@@ -63,20 +152,29 @@ class Games:
         #         collections/
         #             CollectionID
 
-        game = cls.games[game_id]
-        game.clear()
+        #         summary: dict (see GameSummary)
+
+        # The new version is built aside and swapped in at once, so a
+        # reader never sees a half-written game.
+        with disk.staged(cls.games[game_id].path) as game:
+            game["creator"].set_value(user_id)
+            game["info"].mkdir()
+            game["stars"].mkdir()
+            game["collections"].mkdir()
+            # the script and its scenes are stored once, in "source" and
+            # "scenes"; `Game._load` puts them back into `data`
+            game["data"].set_value(cls._stored_data(data))
+            # large values go to the blob store, so an unchanged re-upload
+            # only rewrites the small references
+            game["source"].set_value(data["meta"]["src"])
+            game["scenes"].set_value(data["scenes"])
 
-        game["creator"].set_value(user_id)
-        game["info"].mkdir()
-        game["stars"].mkdir()
-        game["collections"].mkdir()
-        game["data"].set_value(data)
-        game["source"].set_value(data["meta"]["src"])
-        game["scenes"].set_value(data["scenes"])
-        game["scenes"].set_value(data["scenes"])
+            for k, v in data["info"].items():
+                game["info"][k].set_value(v)
 
-        for k, v in data["info"].items():
-            game["info"][k].set_value(v)
+            # the rebuilt game starts without stars
+            summary = GameSummary.of_data(game_id, user_id, data)
+            game["summary"].set_value(summary.to_record())
 
         # users/
         #     UserID/
@@ -85,16 +183,142 @@ class Games:
         #             GameID
 
         disk["users"][user_id]["games"][game_id].set_value(True)
+
+        games_cache.delete(game_id)
+        users_cache.delete(("games", user_id))
+        creators.set(user_id, User(user_id).name, len(User(user_id).games))
+        top_rated.update(summary)
+        search.add(game_id, cls._search_terms(user_id, data["info"]))
         
         return game_id
 
+    @classmethod
+    def _stored_data(cls, data: dict) -> dict:
+        stored = {k: v for k, v in data.items() if k != "scenes"}
+        if isinstance(data.get("meta"), dict):
+            stored["meta"] = {k: v for k, v in data["meta"].items() if k != "src"}
+        return stored
+
     @classmethod
     def get(cls, game_id: str):
         try:
-            return Game(game_id)
+            return cls.load(game_id)
         except:
             return None
 
+    @classmethod
+    def load(cls, game_id: GameID) -> "Game":
+        """
+        The cached Game, loading it on a miss; raises like `Game(...)`.
+        """
+        return games_cache.get_or_compute(game_id, lambda: Game(game_id))
+
+    @classmethod
+    def get_many(cls, game_ids: Iterable[GameID]) -> list["Game"]:
+        """
+        Games for `game_ids` in order, skipping missing ones. Cache
+        misses load concurrently on the I/O pool.
+        """
+        game_ids = list(game_ids)
+        found = {game_id: games_cache.get(game_id) for game_id in game_ids}
+        missing = [game_id for game_id, game in found.items() if game is None]
+        for game_id, game in zip(missing, _async.default_executor().map(cls._load_or_none, missing)):
+            found[game_id] = game
+        return [found[game_id] for game_id in game_ids if found[game_id] is not None]
+
+    @classmethod
+    def summary(cls, game_id: GameID) -> "GameSummary | None":
+        """
+        The game's summary record. Games stored before summaries existed
+        get theirs built from the full game and written on first read.
+        """
+        summary = cls._stored_summary(game_id)
+        if summary is not None:
+            return summary
+        game = cls.get(game_id)
+        if game is None:
+            return None
+        summary = GameSummary.of_game(game)
+        cls.games[game_id]["summary"].set_value(summary.to_record())
+        return summary
+
+    @classmethod
+    def _stored_summary(cls, game_id: GameID) -> "GameSummary | None":
+        record = cls.games[game_id]["summary"].get_value()
+        # records written before the star histogram existed are rebuilt too
+        if isinstance(record, dict) and "histogram" in record.get("stars", {}):
+            return GameSummary.from_record(game_id, record)
+        return None
+
+    @classmethod
+    def rate(cls, game_id: GameID, user_id: UserID | int, stars: int) -> "GameSummary":
+        """
+        Sets the user's stars (0-5) for the game and updates its star
+        aggregate in the summary record, without reading other stars.
+        """
+        user_id = str(user_id)
+        if not isinstance(stars, int) or not 0 <= stars <= 5:
+            raise ValueError(f"Stars must be an int from 0 to 5, got {stars!r}")
+
+        # A missing summary is built before locking: that loads the game
+        # through `games_cache`, whose flight may wait on another thread
+        # that is waiting for this lock.
+        if cls.summary(game_id) is None:
+            raise GameNotFound(game_id)
+        game = cls.games[game_id]
+        with disk.locks.write(game.path):
+            summary = cls._stored_summary(game_id)
+            if summary is None:
+                try:
+                    summary = GameSummary.of_game(Game(game_id))
+                except Exception:
+                    raise GameNotFound(game_id)
+            old = game["stars"][user_id].get_value()
+            summary.add_stars(stars, old if isinstance(old, int) and 0 <= old <= 5 else None)
+            game["stars"][user_id].set_value(stars)
+            game["summary"].set_value(summary.to_record())
+
+        disk["users"][user_id]["starred"][game_id].set_value(stars)
+        top_rated.update(summary)
+        return summary
+
+    @classmethod
+    def top_rated(cls, count: int = 10) -> list["GameSummary"]:
+        return top_rated.top(count)
+
+    @classmethod
+    def search(cls, query: str, count: int = 20) -> list["GameSummary"]:
+        summaries = (cls.summary(game_id) for game_id in search.search(query, count))
+        return [summary for summary in summaries if summary is not None]
+
+    @classmethod
+    def _search_terms(cls, user_id: UserID, info: dict) -> set[str]:
+        texts = (info.get("name"), info.get("description"), info.get("creator"), User(user_id).name)
+        tags = info.get("tags")
+        return _search.document(
+            *(text for text in texts if isinstance(text, str)),
+            tags=[tag for tag in tags if isinstance(tag, str)] if isinstance(tags, list) else [],
+        )
+
+    @classmethod
+    def _search_documents(cls):
+        # every game, for the first search segment
+        for game_id in cls.games.names():
+            info = dict(
+                (name, value) for name, _, value in cls.games[game_id]["info"].iter_children()
+            )
+            creator = cls.games[game_id]["creator"].get_value()
+            if isinstance(creator, str):
+                yield game_id, cls._search_terms(creator, info)
+
+    @classmethod
+    def _load_or_none(cls, game_id: GameID):
+        try:
+            return cls.load(game_id)
+        except Exception:
+            # missing fields surface as plain exceptions from the disk
+            return None
+
 class GameNotFound(DatabaseError):
     pass
 
@@ -128,7 +352,7 @@ class Game:
         #     GameID/
         #         creator: UserID
 
-        #         data: dict
+        #         data: dict (without meta.src and scenes)
         #         source: str
         #         scenes: dict
 
@@ -145,6 +369,12 @@ class Game:
         game = disk["games"][self.game_id]
         self._game_dir = game
 
+        # one shared lock for every field, so a load never mixes the
+        # fields of two versions of a game that is swapped meanwhile
+        with disk.locks.read(game.path):
+            self._load_fields(game)
+
+    def _load_fields(self, game: _disk.File):
         self.creator = game["creator"].get_value_no_default() # type: ignore
         if not isinstance(self.creator, str):
             raise GameFieldTypeFound("creator")
@@ -160,6 +390,10 @@ class Game:
         self.scenes = game["scenes"].get_value_no_default()
         if not isinstance(self.scenes, dict):
             raise GameFieldTypeFound("scenes")
+
+        # games stored before the split still carry both; these win
+        self.data["scenes"] = self.scenes
+        self.data["meta"] = dict(self.data.get("meta") or {}, src=self.source)
         
         self.name = game["info"]["name"].get_value_no_default() # type: ignore
         if not isinstance(self.name, str):
@@ -197,7 +431,7 @@ class Game:
     def stars(self):
         stars: dict[str, int] = {}
 
-        for user_id, stars_count in self._game_dir["stars"].name_value():
+        for user_id, _, stars_count in self._game_dir["stars"].iter_children():
             if isinstance(stars_count, int):
                 stars[user_id] = stars_count
 
@@ -207,11 +441,109 @@ class Game:
     def collections(self):
         collections: list = []
 
-        for collection_id, _ in self._game_dir["stars"].name_value():
+        for collection_id in self._game_dir["stars"].names():
             collections.append(collection_id)
 
         return collections
 
+class GameSummary:
+    """
+    What menus show of a game, read from the small "summary" record
+    instead of loading `data`, `source` and `scenes`.
+    """
+    game_id: GameID
+    name: str
+    version: int | float
+    tags: list
+    creator: UserID
+    stars_count: int
+    stars_sum: int
+    stars_histogram: list[int]  # stars_histogram[n] raters gave n stars
+
+    def __init__(
+        self,
+        game_id: GameID,
+        name: str,
+        version: int | float = 0,
+        tags: list | None = None,
+        creator: UserID = "",
+        stars_count: int = 0,
+        stars_sum: int = 0,
+        stars_histogram: list[int] | None = None,
+    ):
+        self.game_id = game_id
+        self.name = name
+        self.version = version
+        self.tags = tags or []
+        self.creator = creator
+        self.stars_count = stars_count
+        self.stars_sum = stars_sum
+        self.stars_histogram = list(stars_histogram or [0] * 6)
+
+    @property
+    def rating(self) -> float:
+        return self.stars_sum / self.stars_count if self.stars_count else 0.0
+
+    def add_stars(self, stars: int, old: int | None = None):
+        """
+        Counts a rating of `stars`, replacing the rater's `old` one.
+        """
+        if old is not None:
+            self.stars_count -= 1
+            self.stars_sum -= old
+            self.stars_histogram[old] -= 1
+        self.stars_count += 1
+        self.stars_sum += stars
+        self.stars_histogram[stars] += 1
+
+    @classmethod
+    def of_data(cls, game_id: GameID, user_id: UserID, data: dict) -> "GameSummary":
+        info = data["info"]
+        version = info.get("version", 0)
+        tags = info.get("tags", [])
+        return cls(
+            game_id,
+            name=str(info["name"]),
+            version=version if isinstance(version, (int, float)) else 0,
+            tags=tags if isinstance(tags, list) else [],
+            creator=user_id,
+        )
+
+    @classmethod
+    def of_game(cls, game: Game) -> "GameSummary":
+        summary = cls(game.game_id, game.name, game.version, game.tags, game.creator)
+        for stars in game.stars.values():
+            if 0 <= stars <= 5:
+                summary.add_stars(stars)
+        return summary
+
+    @classmethod
+    def from_record(cls, game_id: GameID, record: dict) -> "GameSummary":
+        stars = record.get("stars", {})
+        return cls(
+            game_id,
+            name=record.get("name", ""),
+            version=record.get("version", 0),
+            tags=record.get("tags", []),
+            creator=record.get("creator", ""),
+            stars_count=stars.get("count", 0),
+            stars_sum=stars.get("sum", 0),
+            stars_histogram=stars.get("histogram"),
+        )
+
+    def to_record(self) -> dict:
+        return {
+            "name": self.name,
+            "version": self.version,
+            "tags": self.tags,
+            "creator": self.creator,
+            "stars": {
+                "count": self.stars_count,
+                "sum": self.stars_sum,
+                "histogram": self.stars_histogram,
+            },
+        }
+
 class User:
     def __init__(self, user_id: str | int):
         self.user_id = str(user_id)
@@ -234,10 +566,12 @@ class User:
     #             GameID = 0-5 (stars)
 
     #         progress/
-    #             GameID = "scene name"
+    #             GameID = {"scene": str, "history": [str], "time": float}
+    #                      (see ProgressStore; older trees hold the scene name)
 
     def create(self, name: str):
         self._user_dir["info"]["name"].set_value(name)
+        creators.rename(self.user_id, name)
 
     @property
     def name(self):
@@ -259,16 +593,38 @@ class User:
 
     @property
     def games(self) -> list[GameID]:
-        value = self._user_dir["games"].names()
+        value = users_cache.get_or_compute(("games", self.user_id), self._load_games)
         return list(value)
+
+    def _load_games(self) -> list[GameID]:
+        return list(self._user_dir["games"].names())
     
     @property
     def game_objects(self):
-        for game_id in self._user_dir["games"].names():
-            try:
-                yield Game(game_id)
-            except DatabaseError:
-                continue
+        yield from Games.get_many(self.games)
+
+    def game_summaries(self):
+        # one small record per game; the games themselves stay on disk
+        for game_id in self.games:
+            summary = Games.summary(game_id)
+            if summary is not None:
+                yield summary
+
+    def game_page(self, cursor: str | None = None, size: int = PAGE_SIZE) -> Page:
+        """
+        A page of the user's game summaries in creation order; only the
+        page's summaries are read.
+        """
+        page = Page.of(sorted(map(self._game_key, self.games)), cursor, size)
+        summaries = (Games.summary(game_id) for _, game_id in page.items)
+        page.items = [summary for summary in summaries if summary is not None]
+        return page
+
+    @staticmethod
+    def _game_key(game_id: GameID) -> tuple[int, GameID]:
+        # USER_ID:INC
+        index = game_id.rpartition(":")[2]
+        return (int(index) if index.isdigit() else 0, game_id)
 
     @property
     def collections(self) -> list[GameID]:
@@ -280,6 +636,400 @@ class User:
         return self._user_dir["info"]["name"].exists()
     
 
+class CreatorIndex:
+    """
+    `(user_id, name, game_count)` of every user with at least one game.
+
+    Entries are stored one per creator under `directory` and read into
+    memory on first use; `set`/`rename` update both. Creators are kept
+    sorted by casefolded name, so a name prefix is a bisect away. The
+    index is built from the user tree when `directory` does not exist.
+    """
+    def __init__(self, directory: _disk.File):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._entries: dict[UserID, tuple[str, int]] | None = None
+        self._sorted: list[tuple[str, UserID]] = []
+
+    def _loaded(self) -> dict[UserID, tuple[str, int]]:
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            return self._entries # type: ignore
+
+    def _load(self):
+        if not self.directory.exists():
+            self._rebuild()
+        entries: dict[UserID, tuple[str, int]] = {}
+        for user_id, _, value in self.directory.iter_children():
+            if isinstance(value, (list, tuple)) and len(value) == 2:
+                entries[user_id] = (str(value[0]), int(value[1]))
+        self._entries = entries
+        self._sorted = sorted((name.casefold(), user_id) for user_id, (name, _) in entries.items())
+
+    def _rebuild(self):
+        self.directory.mkdir()
+        for user_id, _, _ in disk["users"].iter_children(values=False):
+            user = User(user_id)
+            count = len(user.games)
+            if count:
+                self.directory[user_id].set_value([user.name, count])
+
+    def reload(self):
+        """
+        Drops the in-memory copy, e.g. after another process wrote.
+        """
+        with self._lock:
+            self._entries = None
+
+    def get(self, user_id: UserID) -> tuple[str, int] | None:
+        return self._loaded().get(user_id)
+
+    def set(self, user_id: UserID, name: str, game_count: int):
+        entries = self._loaded()
+        with self._lock:
+            old = entries.pop(user_id, None)
+            if old is not None:
+                self._sorted.remove((old[0].casefold(), user_id))
+            if game_count <= 0:
+                self.directory[user_id].delete()
+                return
+            entries[user_id] = (name, game_count)
+            key = (name.casefold(), user_id)
+            self._sorted.insert(bisect_left(self._sorted, key), key)
+            self.directory[user_id].set_value([name, game_count])
+
+    def rename(self, user_id: UserID, name: str):
+        entry = self.get(user_id)
+        if entry is not None and entry[0] != name:
+            self.set(user_id, name, entry[1])
+
+    def items(self, prefix: str = "") -> list[tuple[UserID, str, int]]:
+        """
+        Creators whose name starts with `prefix` (case-insensitive),
+        ordered by name.
+        """
+        entries = self._loaded()
+        prefix = prefix.casefold()
+        with self._lock:
+            start = bisect_left(self._sorted, (prefix, ""))
+            found = []
+            for name, user_id in self._sorted[start:]:
+                if not name.startswith(prefix):
+                    break
+                found.append((user_id, *entries[user_id]))
+        return found
+
+    def page(self, cursor: str | None = None, size: int = PAGE_SIZE) -> Page:
+        """
+        A page of `(user_id, name, game_count)`, ordered by name.
+        """
+        entries = self._loaded()
+        with self._lock:
+            page = Page.of(self._sorted, cursor, size)
+            page.items = [(user_id, *entries[user_id]) for _, user_id in page.items]
+        return page
+
+    def __len__(self) -> int:
+        return len(self._loaded())
+
+
+creators = CreatorIndex(disk["indexes"]["creators"])
+
+
+class TopRated:
+    """
+    The best rated games, best first: by average stars, then by number
+    of raters.
+
+    Up to `2 * size` entries are kept sorted in memory and in `record`.
+    When one has to be dropped, its key becomes the `floor`: no game
+    outside the list ranks above it, so the entries ranking above the
+    floor are exact. `top` rebuilds from the games' summary records
+    only when fewer than it needs are left above the floor.
+    """
+    def __init__(self, record: _disk.File, size: int = 100):
+        self.record = record
+        self.capacity = 2 * size
+        self._lock = threading.Lock()
+        self._keys: dict[GameID, tuple] | None = None
+        self._sorted: list[tuple] = []
+        self._floor: tuple | None = None
+
+    @staticmethod
+    def _key(game_id: GameID, stars_count: int, stars_sum: int) -> tuple:
+        return (-stars_sum / stars_count, -stars_count, game_id)
+
+    def _loaded(self) -> dict[GameID, tuple]:
+        if self._keys is None:
+            value = self.record.get_value()
+            if isinstance(value, dict):
+                self._set([tuple(key) for key in value["games"]], value["floor"])
+            else:
+                self._rebuild()
+        return self._keys # type: ignore
+
+    def _set(self, keys: list[tuple], floor: list | None):
+        self._sorted = sorted(keys)
+        self._keys = {key[2]: key for key in self._sorted}
+        self._floor = tuple(floor) if floor is not None else None
+
+    def _rebuild(self):
+        keys = []
+        for game_id in disk["games"].names():
+            summary = Games.summary(game_id)
+            if summary is not None and summary.stars_count:
+                keys.append(self._key(game_id, summary.stars_count, summary.stars_sum))
+        keys.sort()
+        self._set(keys[:self.capacity], keys[self.capacity] if len(keys) > self.capacity else None)
+        self._save()
+
+    def _save(self):
+        self.record.set_value({
+            "games": [list(key) for key in self._sorted],
+            "floor": list(self._floor) if self._floor is not None else None,
+        })
+
+    def update(self, summary: "GameSummary"):
+        """
+        Re-ranks the game after its stars changed.
+        """
+        with self._lock:
+            keys = self._loaded()
+            old = keys.pop(summary.game_id, None)
+            if old is not None:
+                self._sorted.remove(old)
+            key = None
+            if summary.stars_count:
+                key = self._key(summary.game_id, summary.stars_count, summary.stars_sum)
+            # a game below the floor stays out, like every other one there
+            if key is not None and (self._floor is None or key < self._floor):
+                keys[summary.game_id] = key
+                self._sorted.insert(bisect_left(self._sorted, key), key)
+                if len(self._sorted) > self.capacity:
+                    dropped = self._sorted.pop()
+                    del keys[dropped[2]]
+                    self._floor = dropped if self._floor is None else min(self._floor, dropped)
+            elif old is None:
+                return
+            self._save()
+
+    def top(self, count: int = 10) -> list["GameSummary"]:
+        with self._lock:
+            self._loaded()
+            exact = [key for key in self._sorted if self._floor is None or key < self._floor]
+            if len(exact) < count and self._floor is not None:
+                self._rebuild()
+                exact = self._sorted
+            game_ids = [key[2] for key in exact[:count]]
+        summaries = (Games.summary(game_id) for game_id in game_ids)
+        return [summary for summary in summaries if summary is not None]
+
+    def reload(self):
+        """
+        Drops the in-memory copy, e.g. after another process wrote.
+        """
+        with self._lock:
+            self._keys = None
+
+
+top_rated = TopRated(disk["indexes"]["top_rated"])
+
+
+class Rankings:
+    """
+    The latest snapshot of the ranking job (`python -m database.ranking`),
+    read once and kept in memory until `reload`.
+
+    The snapshot is one record of packed arrays indexed like its `games`
+    list: "score" (Bayesian average, float32), "count" (ratings, int32),
+    "trend" (score change since the previous snapshot, float32), and the
+    int32 index lists "order", "trending" and "tags"[tag], best first.
+    """
+    def __init__(self, record: _disk.File):
+        self.record = record
+        self._lock = threading.Lock()
+        self._snapshot: dict | None = None
+
+    def _loaded(self) -> dict:
+        with self._lock:
+            if self._snapshot is None:
+                value = self.record.get_value()
+                self._snapshot = self._unpack(value) if isinstance(value, dict) else {}
+            return self._snapshot
+
+    @staticmethod
+    def _unpack(value: dict) -> dict:
+        def packed(typecode: str, data: bytes) -> array:
+            values = array(typecode)
+            values.frombytes(data)
+            return values
+
+        return {
+            "generated": value["generated"],
+            "games": value["games"],
+            "index": {game_id: i for i, game_id in enumerate(value["games"])},
+            "score": packed("f", value["score"]),
+            "count": packed("i", value["count"]),
+            "trend": packed("f", value["trend"]),
+            "order": packed("i", value["order"]),
+            "trending": packed("i", value["trending"]),
+            "tags": {tag: packed("i", data) for tag, data in value["tags"].items()},
+        }
+
+    def reload(self):
+        with self._lock:
+            self._snapshot = None
+
+    @property
+    def generated(self) -> float | None:
+        return self._loaded().get("generated")
+
+    def score(self, game_id: GameID) -> tuple[float, int, float] | None:
+        """
+        `(score, ratings, trend)` of the game, if it was ranked.
+        """
+        snapshot = self._loaded()
+        i = snapshot.get("index", {}).get(game_id)
+        if i is None:
+            return None
+        return snapshot["score"][i], snapshot["count"][i], snapshot["trend"][i]
+
+    def _ids(self, indexes, count: int) -> list[GameID]:
+        games = self._loaded().get("games", [])
+        return [games[i] for i in indexes[:count]]
+
+    def top(self, count: int = 10) -> list[GameID]:
+        return self._ids(self._loaded().get("order", []), count)
+
+    def trending(self, count: int = 10) -> list[GameID]:
+        return self._ids(self._loaded().get("trending", []), count)
+
+    def by_tag(self, tag: str, count: int = 10) -> list[GameID]:
+        return self._ids(self._loaded().get("tags", {}).get(tag, []), count)
+
+    def tags(self) -> list[str]:
+        return sorted(self._loaded().get("tags", {}))
+
+
+rankings = Rankings(disk["indexes"]["rankings"])
+
+search = _search.SearchIndex(disk, Games._search_documents)
+
+
+class ProgressStore:
+    """
+    Where each player is in each game, written behind.
+
+    `record` only updates memory. A daemon thread writes the latest
+    entry of every player who moved since the last flush, every `interval`
+    seconds or once `count` players are waiting, so many clicks cost one
+    write. `flush` also runs at interpreter exit. Entries whose write
+    failed are retried with the next flush.
+    """
+    def __init__(
+        self,
+        users: _disk.File,
+        interval: float = PROGRESS_FLUSH_INTERVAL,
+        count: int = PROGRESS_FLUSH_COUNT,
+    ):
+        self.users = users
+        self.interval = interval
+        self.count = count
+        self.recorded = 0
+        self.written = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._pending: dict[tuple[UserID, GameID], dict] = {}
+        self._writing: dict[tuple[UserID, GameID], dict] = {}
+        atexit.register(self.flush)
+
+    def record(self, user_id: UserID | int, game_id: GameID, scene: str, history: list[str]):
+        entry = {"scene": scene, "history": list(history[-PROGRESS_HISTORY:]), "time": time.time()}
+        with self._lock:
+            self._pending[(str(user_id), game_id)] = entry
+            self.recorded += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="questly-progress", daemon=True)
+                self._thread.start()
+            if len(self._pending) >= self.count:
+                self._wake.set()
+
+    def get(self, user_id: UserID | int, game_id: GameID) -> dict | None:
+        """
+        The player's latest `{"scene", "history", "time"}` in the game,
+        saved or not.
+        """
+        key = (str(user_id), game_id)
+        with self._lock:
+            entry = self._pending.get(key) or self._writing.get(key)
+        if entry is None:
+            value = self._file(*key).get_value()
+            if isinstance(value, str):
+                entry = {"scene": value, "history": [], "time": 0.0}
+            elif isinstance(value, dict) and isinstance(value.get("scene"), str):
+                entry = value
+        return dict(entry) if entry is not None else None
+
+    def forget(self, user_id: UserID | int, game_id: GameID):
+        key = (str(user_id), game_id)
+        with self._flush_lock:
+            with self._lock:
+                self._pending.pop(key, None)
+            self._file(*key).delete()
+
+    def flush(self) -> int:
+        """
+        Writes every pending entry now; returns how many were written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._writing, self._pending = self._pending, {}
+            written = 0
+            try:
+                for (user_id, game_id), entry in self._writing.items():
+                    self._file(user_id, game_id).set_value(entry)
+                    written += 1
+            finally:
+                with self._lock:
+                    unwritten = list(self._writing.items())[written:]
+                    self.failed += len(unwritten)
+                    # a newer move made meanwhile wins over the unwritten one
+                    for key, entry in unwritten:
+                        self._pending.setdefault(key, entry)
+                    self._writing = {}
+                    self.written += written
+            return written
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # the thread keeps running; unwritten entries are retried
+                log.exception("Progress flush failed, retrying with the next one")
+
+    def _file(self, user_id: UserID, game_id: GameID) -> _disk.File:
+        return self.users[user_id]["progress"][game_id]
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "recorded": self.recorded,
+                "written": self.written,
+                "failed": self.failed,
+            }
+
+
+progress = ProgressStore(disk["users"])
+
+
 class Users:
     @classmethod
     def ids(cls) -> list[str]:
@@ -287,14 +1037,25 @@ class Users:
     
     @classmethod
     def name_id(cls):
-        for user_dir in disk["users"]:
-            id: str = user_dir.name
-            name = user_dir["info"]["name"].get_value()
+        """
+        `(name, user_id)` of every creator, ordered by name.
+        """
+        for user_id, name, _ in creators.items():
+            yield (name, user_id)
 
-            if not isinstance(name, str):
-                continue
+    @classmethod
+    def creators(cls, prefix: str = "") -> list[tuple[UserID, str, int]]:
+        return creators.items(prefix)
 
-            yield (name, id)
+    @classmethod
+    def page(cls, cursor: str | None = None, size: int = PAGE_SIZE) -> Page:
+        """
+        A page of `(name, user_id)` of creators, ordered by name like
+        `name_id`, served from the creator index.
+        """
+        page = creators.page(cursor, size)
+        page.items = [(name, user_id) for user_id, name, _ in page.items]
+        return page
 
 
 """
@@ -1,78 +1,168 @@
 import hashlib
 import base64
+import threading
+from functools import lru_cache
+from typing import Iterable
 
 from . import _disk
 
-disk = _disk.Disk()
+disk = _disk.open_disk()
 
+# Trees written before `HashIndex` kept one file per hash here:
+#     hashes/{games,users,collections}/<hash> = id
 hashes = disk["hashes"]
-collections = hashes["collections"]
-games = hashes["games"]
-users = hashes["users"]
 
 class Ids:
+    # users/
+    #     UserID/
+    #         counters/
+    #             games: int        last game index handed out
+    #             collections: int  last collection index handed out
+
     @classmethod
     def make_collection_id(cls, user_id: int | str):
         user_id = str(user_id)
-        max_index = 0 
-
-        for collection_id_file in disk["users"][user_id]["author_ids"]:
-            # USER_ID:INC 2461621604:1
-            collection_id: str = collection_id_file.name
-            index: int = int(collection_id.split(":")[1])
-
-            if max_index < index:
-                max_index = index
-
-        new_index = max_index + 1
-
+        user = disk["users"][user_id]
+        new_index = user["counters"]["collections"].increment(
+            start=lambda: cls._max_index(user["author_ids"])
+        )
         return f"{user_id}:{new_index}"
     
     @classmethod
     def make_game_id(cls, user_id: str):
-        max_index = 0 
+        user = disk["users"][user_id]
+        new_index = user["counters"]["games"].increment(
+            start=lambda: cls._max_index(user["games"])
+        )
+        return f"{user_id}:{new_index}"
+
+    @classmethod
+    def _max_index(cls, ids: _disk.File) -> int:
+        """
+        Recovery scan for users whose counter does not exist yet: the
+        highest index among their existing ids.
+        """
+        max_index = 0
 
-        for game_id_file in disk["users"][user_id]["games"]:
+        for id in ids.names():
             # USER_ID:INC 2461621604:1
-            game_id: str = game_id_file.name
-            index: int = int(game_id.split(":")[1])
+            try:
+                index: int = int(id.split(":")[1])
+            except (IndexError, ValueError):
+                continue
 
             if max_index < index:
                 max_index = index
 
-        new_index = max_index + 1
-
-        return f"{user_id}:{new_index}"
+        return max_index
     
     @classmethod
     def get_game_id(cls, game_hash: str) -> str | None:
-        game = games[game_hash]
-        game_id = game.get_value(None)
-
-        if isinstance(game_id, str):
-            return game_id
+        return index.resolve("games", game_hash)
     
     @classmethod
     def get_user_id(cls, user_hash: str):
-        user = users[user_hash]
-        user_id = user.get_value(None)
-        
-        if isinstance(user_id, str):
-            return user_id
+        return index.resolve("users", user_hash)
         
     @classmethod
     def get_collection_id(cls, collection_hash: str):
-        collection = collections[collection_hash]
-        collection_id = collection.get_value(None)
-        
-        if isinstance(collection_id, str):
-            return collection_id
+        return index.resolve("collections", collection_hash)
     
     @classmethod
     def get_user_id_from_id(cls, id: str):
         return id.split(":")[0]
         
     
+@lru_cache(maxsize=65536)
 def hash_id(id: str) -> str:
     h = hashlib.sha256(id.encode()).digest()
-    return base64.urlsafe_b64encode(h).decode().rstrip("=")
\ No newline at end of file
+    return base64.urlsafe_b64encode(h).decode().rstrip("=")
+
+
+class HashIndex:
+    """
+    Every hash <-> id mapping of every kind ("games", "users",
+    "collections") held in memory, and persisted as the append-only
+    log "hashes" of "<kind> <hash> <id>" records.
+
+    A lookup is a dict read. A miss first reads whatever the log gained
+    since it was last read, so mappings added by other processes are
+    found as well. Mappings that are already known are never rewritten.
+    """
+    LOG = "hashes"
+    KINDS = ("games", "users", "collections")
+
+    def __init__(self, disk: _disk.Disk):
+        self.disk = disk
+        self._lock = threading.Lock()
+        self._ids: dict[tuple[str, str], str] = {}
+        self._hashes: dict[tuple[str, str], str] = {}
+        self._position: int | None = None
+
+    def _ensure_loaded(self):
+        if self._position is None:
+            self._position = 0
+            self._read_tail()
+            if not self._ids:
+                self._import_legacy()
+
+    def _read_tail(self):
+        records, self._position = self.disk._read_log(self.LOG, self._position or 0)
+        for record in records:
+            kind, hash, id = record.split(" ", 2)
+            self._ids[(kind, hash)] = id
+            self._hashes[(kind, id)] = hash
+
+    def _import_legacy(self):
+        records = []
+        for kind in self.KINDS:
+            for hash, _, id in hashes[kind].iter_children():
+                if isinstance(id, str):
+                    records.append(f"{kind} {hash} {id}")
+        if records:
+            self.disk._append_log(self.LOG, records)
+            self._read_tail()
+
+    def put(self, kind: str, id: str) -> str:
+        """
+        Records `id` under its hash and returns the hash.
+        """
+        hash = hash_id(id)
+        with self._lock:
+            self._ensure_loaded()
+            if self._ids.get((kind, hash)) != id:
+                self.disk._append_log(self.LOG, [f"{kind} {hash} {id}"])
+                self._read_tail()
+        return hash
+
+    def resolve(self, kind: str, hash: str) -> str | None:
+        return self.resolve_many(kind, [hash])[hash]
+
+    def resolve_many(self, kind: str, hashes: Iterable[str]) -> dict[str, str | None]:
+        """
+        The id of every hash, or None for unknown ones; reads the log
+        at most once.
+        """
+        hashes = list(hashes)
+        with self._lock:
+            self._ensure_loaded()
+            if any((kind, hash) not in self._ids for hash in hashes):
+                self._read_tail()
+            return {hash: self._ids.get((kind, hash)) for hash in hashes}
+
+    def hash_of(self, kind: str, id: str) -> str | None:
+        with self._lock:
+            self._ensure_loaded()
+            return self._hashes.get((kind, id))
+
+    def reset(self):
+        """
+        Forgets the in-memory copy, e.g. after the Disk was cleared.
+        """
+        with self._lock:
+            self._ids.clear()
+            self._hashes.clear()
+            self._position = None
+
+
+index = HashIndex(disk)
\ No newline at end of file
@@ -0,0 +1,182 @@
+"""
+Batch ranking job: scores every rated game in one vectorized pass and
+writes the snapshot `database.rankings` serves.
+
+    python -m database.ranking [--prior 10] [--every 3600]
+
+Ratings come from the star histograms in the games' summary records
+(see `Games.rate`), one small read per game however many raters it
+has. Scores are Bayesian averages
+
+    (prior * mean + sum of stars) / (prior + ratings)
+
+with `mean` the average over all ratings and `prior` the mean number of
+ratings per rated game unless QUESTLY_RANKING_PRIOR / --prior sets it.
+Trends are measured against the snapshot being replaced.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+from . import _async, database
+
+PRIOR = float(os.environ.get("QUESTLY_RANKING_PRIOR", "0"))  # 0: automatic
+
+STARS = np.arange(6)
+
+
+# -----------------------------
+# Input
+# -----------------------------
+def collect() -> tuple[list[str], np.ndarray, list[list[str]]]:
+    """
+    Ids, star histograms (games x 6) and tags of every game with a
+    summary; summaries load concurrently on the I/O pool.
+    """
+    game_ids = list(database.disk["games"].names())
+    summaries = _async.default_executor().map(database.Games.summary, game_ids)
+    ids, histograms, tags = [], [], []
+    for game_id, summary in zip(game_ids, summaries):
+        if summary is not None:
+            ids.append(game_id)
+            histograms.append(summary.stars_histogram)
+            tags.append(summary.tags)
+    return ids, np.array(histograms, dtype=np.int64).reshape(-1, 6), tags
+
+
+# -----------------------------
+# Ranking
+# -----------------------------
+def rank(
+    game_ids: list[str],
+    histograms: np.ndarray,
+    tags: list[list[str]],
+    previous: dict | None = None,
+    prior: float = PRIOR,
+) -> dict:
+    """
+    The snapshot record for the given games; unrated ones are left out.
+    """
+    counts = histograms.sum(axis=1)
+    rated = np.flatnonzero(counts > 0)
+    game_ids = [game_ids[i] for i in rated]
+    tags = [tags[i] for i in rated]
+    counts = counts[rated]
+    sums = histograms[rated] @ STARS
+
+    total = counts.sum()
+    mean = sums.sum() / total if total else 0.0
+    if not prior:
+        prior = total / len(counts) if len(counts) else 1.0
+    scores = (prior * mean + sums) / (prior + counts)
+
+    # best first; more ratings break ties
+    order = np.lexsort((-counts, -scores))
+    position = np.empty_like(order)
+    position[order] = np.arange(len(order))
+
+    trend, new_ratings = _deltas(game_ids, scores, counts, previous)
+    trending = np.lexsort((-trend, -new_ratings))
+    trending = trending[new_ratings[trending] > 0]
+
+    return {
+        "generated": time.time(),
+        "prior": float(prior),
+        "mean": float(mean),
+        "games": game_ids,
+        "score": scores.astype(np.float32).tobytes(),
+        "count": counts.astype(np.int32).tobytes(),
+        "trend": trend.astype(np.float32).tobytes(),
+        "order": order.astype(np.int32).tobytes(),
+        "trending": trending.astype(np.int32).tobytes(),
+        "tags": _by_tag(tags, position),
+    }
+
+
+def _deltas(game_ids: list[str], scores: np.ndarray, counts: np.ndarray, previous: dict | None):
+    """
+    Score change and new ratings since `previous`; games it did not
+    rank count as new, with no score change.
+    """
+    if not previous:
+        return np.zeros_like(scores), counts.copy()
+    index = {game_id: i for i, game_id in enumerate(previous["games"])}
+    old = np.array([index.get(game_id, -1) for game_id in game_ids], dtype=np.int64)
+    known = old >= 0
+    old_scores = np.frombuffer(previous["score"], dtype=np.float32).astype(np.float64)
+    old_counts = np.frombuffer(previous["count"], dtype=np.int32).astype(np.int64)
+
+    trend = np.zeros_like(scores)
+    trend[known] = scores[known] - old_scores[old[known]]
+    new_ratings = counts.copy()
+    new_ratings[known] -= old_counts[old[known]]
+    return trend, new_ratings
+
+
+def _by_tag(tags: list[list[str]], position: np.ndarray) -> dict[str, bytes]:
+    """
+    For every tag, the indexes of its games ordered by overall rank.
+    """
+    names: dict[str, int] = {}
+    pairs_tag, pairs_game = [], []
+    for game, game_tags in enumerate(tags):
+        for tag in set(game_tags):
+            pairs_tag.append(names.setdefault(tag, len(names)))
+            pairs_game.append(game)
+    if not pairs_tag:
+        return {}
+
+    tag_of = np.array(pairs_tag, dtype=np.int64)
+    game_of = np.array(pairs_game, dtype=np.int64)
+    sort = np.lexsort((position[game_of], tag_of))
+    tag_of, game_of = tag_of[sort], game_of[sort]
+    bounds = np.flatnonzero(np.diff(tag_of)) + 1
+
+    by_id = {i: tag for tag, i in names.items()}
+    return {
+        by_id[int(group_tags[0])]: group_games.astype(np.int32).tobytes()
+        for group_tags, group_games in zip(np.split(tag_of, bounds), np.split(game_of, bounds))
+    }
+
+
+# -----------------------------
+# Job
+# -----------------------------
+def run(prior: float = PRIOR) -> dict:
+    """
+    Ranks every game, replaces the stored snapshot and returns it.
+    """
+    record = database.rankings.record
+    previous = record.get_value()
+    snapshot = rank(*collect(), previous=previous if isinstance(previous, dict) else None, prior=prior)
+    record.set_value(snapshot)
+    database.rankings.reload()
+    return snapshot
+
+
+def _option(args: list[str], name: str, default=None):
+    if name in args:
+        return args[args.index(name) + 1]
+    return default
+
+
+def main(args: list[str] = sys.argv[1:]) -> int:
+    prior = float(_option(args, "--prior", PRIOR))
+    every = _option(args, "--every")
+    while True:
+        start = time.perf_counter()
+        snapshot = run(prior)
+        print(
+            f"ranked {len(snapshot['games'])} games, {len(snapshot['tags'])} tags "
+            f"in {time.perf_counter() - start:.2f}s (prior {snapshot['prior']:.1f})",
+            file=sys.stderr,
+        )
+        if every is None:
+            return 0
+        time.sleep(float(every))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
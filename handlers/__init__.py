@@ -1,5 +1,7 @@
 from . import (
     start,
     help,
-    create
+    create,
+    top,
+    search
 )
@@ -14,7 +14,7 @@ class CreateHandler(mixins.RunningMixin):
 
     _game_code: str
     _game_id: str
-    _game_to_update: database.Game | None
+    _game_to_update: database.GameSummary | None
 
     _creator: database.User
     _game: database.Game
@@ -43,16 +43,16 @@ class CreateHandler(mixins.RunningMixin):
     def maybe_updated(self):
         self.load_creator()
 
-        games = {game.name: game for game in self._creator.game_objects}
+        games = {summary.name: summary for summary in self._creator.game_summaries()}
 
         self.chain.sender.set_title("👀 Update or create a game?")
         self.chain.sender.set_message("Which one would you like to update, or create a new one?")
 
-        keyboard: dict[str, database.Game | None] = games.copy() # type: ignore
+        keyboard: dict[str, database.GameSummary | None] = games.copy() # type: ignore
         keyboard["🆕 Create a new one"] = None
 
         @self.chain.inline_keyboard(keyboard)
-        def _(message, game: database.Game | None):
+        def _(message, game: database.GameSummary | None):
             self._game_to_update = game
             self.chain.set_inline_keyboard({})
             self.entry_code()
@@ -96,17 +96,18 @@ class CreateHandler(mixins.RunningMixin):
 
         current_game_name = data["info"]["name"]
         game_id: str | None = None
+        old_games = list(self._creator.game_summaries())
 
-        if isinstance(self._game_to_update, database.Game):
+        if isinstance(self._game_to_update, database.GameSummary):
             # update
-            for old_game in self._creator.game_objects:
+            for old_game in old_games:
                 if (current_game_name == old_game.name) and (old_game.game_id != self._game_to_update.game_id):
                     raise AssertionError(f"Game named '{current_game_name}' already exists")
 
             game_id = self._game_to_update.game_id
         else:
             # new game, but i need to check it
-            for old_game in self._creator.game_objects:
+            for old_game in old_games:
                 if current_game_name == old_game.name:
                     game_id = old_game.game_id
 
@@ -0,0 +1,83 @@
+import telebot.types # type: ignore
+import telekit
+import typing
+
+from database import database
+import mixins
+
+# ---------------------------
+#  Structures
+# ---------------------------
+
+class SearchHandler(mixins.RunningMixin):
+
+    _query: str
+    _creator: database.User
+    _game: database.Game
+
+    # ------------------------------------------
+    # Initialization
+    # ------------------------------------------
+
+    @classmethod
+    def init_handler(cls, bot: telebot.TeleBot) -> None:
+        """
+        Initializes the message handler for the '/search' command.
+        """
+        @bot.message_handler(commands=['search']) # type: ignore
+        def handler(message: telebot.types.Message) -> None: # type: ignore
+            cls(message).handle(message)
+
+    # ------------------------------------------
+    # Handling Logic
+    # ------------------------------------------
+
+    def handle(self, message: telebot.types.Message) -> None:
+        # "/search space pirates" searches right away
+        query = (message.text or "").partition(" ")[2].strip()
+
+        if query:
+            self.show_results(query)
+        else:
+            self.entry_query()
+
+    def entry_query(self):
+        self.chain.sender.set_title("🔎 Search Games")
+        self.chain.sender.set_message("Send a few words from a game's name, description or author, or a #tag.")
+
+        @self.chain.entry(delete_user_response=True)
+        def _(message):
+            if message.content_type != 'text':
+                return self.exception(TypeError(f"Not a text message, this is {message.content_type}."))
+            self.show_results(message.text)
+
+        self.chain.edit()
+
+    def show_results(self, query: str):
+        self._query = query
+        games: dict[str, database.GameSummary | None] = {
+            **self.game_buttons(database.Games.search(query, 20))
+        }
+        games["🔎 New search"] = None
+
+        self.chain.sender.set_title(f"🔎 \"{query}\"")
+        if len(games) > 1:
+            self.chain.sender.set_message("These games match your search.\n\nWhich one will you play?")
+        else:
+            self.chain.sender.set_message("No game matches your search.")
+
+        @self.chain.inline_keyboard(games)
+        def _(message, summary: database.GameSummary | None):
+            if summary is None:
+                return self.entry_query()
+            game = database.Games.get(summary.game_id)
+            if game is None:
+                return self.exception(database.GameNotFound(summary.name))
+            self._game = game
+            self._creator = database.User(game.creator)
+            self.run()
+
+        self.chain.edit()
+
+    def back(self):
+        self.show_results(self._query)
@@ -13,6 +13,7 @@ class StartHandler(mixins.RunningMixin):
 
     _creator: database.User
     _game: database.Game
+    _games_cursor: str | None = None
 
     # ------------------------------------------
     # Initialization
@@ -34,32 +35,54 @@ class StartHandler(mixins.RunningMixin):
     def handle(self) -> None:
         self.choose_creator()
 
-    def choose_creator(self):
-        creators = dict(database.Users.name_id())
+    def choose_creator(self, cursor: str | None = None):
+        page = database.Users.page(cursor)
+        creators: dict[str, typing.Any] = dict(page.items)
+        self.add_page_buttons(creators, page)
 
         self.chain.sender.set_title("🧑‍💻 Pick an Author")
         self.chain.sender.set_message("Choose an author to explore their amazing creations!")
 
         @self.chain.inline_keyboard(creators)
-        def _(message, creator: str):
+        def _(message, creator: typing.Any):
+            if isinstance(creator, tuple):
+                return self.choose_creator(creator[1])
             self._creator = database.User(creator)
+            self._games_cursor = None
             self.choose_game()
 
         self.chain.edit()
     
-    def choose_game(self):
-        games = {game.name: game for game in self._creator.game_objects}
+    def choose_game(self, cursor: str | None = None):
+        if cursor is not None:
+            self._games_cursor = cursor
+        page = self._creator.game_page(self._games_cursor)
+        games: dict[str, typing.Any] = {summary.name: summary for summary in page.items}
+        self.add_page_buttons(games, page)
 
         self.chain.sender.set_title("💿 Pick a Game")
         self.chain.sender.set_message(f"{self._creator.name} has created the following games.\n\nWhich one will you play?") # self._creator.name
 
         @self.chain.inline_keyboard(games)
-        def _(message, game: database.Game):
+        def _(message, summary: typing.Any):
+            if isinstance(summary, tuple):
+                return self.choose_game(summary[1])
+            # only the chosen game is loaded in full
+            game = database.Games.get(summary.game_id)
+            if game is None:
+                return self.exception(database.GameNotFound(summary.name))
             self._game = game
             self.prepare()
 
         self.chain.edit()
 
+    def add_page_buttons(self, keyboard: dict[str, typing.Any], page: database.Page):
+        # ("page", cursor) values are told apart from items by their type
+        if page.prev is not None:
+            keyboard["« Prev"] = ("page", page.prev)
+        if page.next is not None:
+            keyboard["Next »"] = ("page", page.next)
+
     def prepare(self):
         self.run()
 
@@ -0,0 +1,62 @@
+import telebot.types # type: ignore
+import telekit
+import typing
+
+from database import database
+import mixins
+
+# ---------------------------
+#  Structures
+# ---------------------------
+
+class TopHandler(mixins.RunningMixin):
+
+    _creator: database.User
+    _game: database.Game
+
+    # ------------------------------------------
+    # Initialization
+    # ------------------------------------------
+
+    @classmethod
+    def init_handler(cls, bot: telebot.TeleBot) -> None:
+        """
+        Initializes the message handler for the '/top' command.
+        """
+        @bot.message_handler(commands=['top']) # type: ignore
+        def handler(message: telebot.types.Message) -> None: # type: ignore
+            cls(message).handle()
+
+    # ------------------------------------------
+    # Handling Logic
+    # ------------------------------------------
+
+    def handle(self) -> None:
+        self.choose_game()
+
+    def choose_game(self):
+        # rendered from the leaderboard and summary records only
+        games = self.game_buttons(
+            database.Games.top_rated(10),
+            label=lambda summary: f"⭐ {summary.rating:.1f} · {summary.name}",
+        )
+
+        self.chain.sender.set_title("🏆 Top Games")
+        if games:
+            self.chain.sender.set_message("The best rated games so far.\n\nWhich one will you play?")
+        else:
+            self.chain.sender.set_message("No game has been rated yet.")
+
+        @self.chain.inline_keyboard(games)
+        def _(message, summary: database.GameSummary):
+            game = database.Games.get(summary.game_id)
+            if game is None:
+                return self.exception(database.GameNotFound(summary.name))
+            self._game = game
+            self._creator = database.User(game.creator)
+            self.run()
+
+        self.chain.edit()
+
+    def back(self):
+        self.choose_game()
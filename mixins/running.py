@@ -33,18 +33,47 @@ class RunningMixin(telekit.Handler):
                 (f"📌 Tags: {", ".join(self._game.tags)}\n\n" if self._game.tags else "") +\
                 self._game.message
             )
-            self.chain.set_inline_keyboard(
-                {
-                    "⬅️ Back":               lambda _: self.back(),
-                    self._game.start_button: lambda _: self.prepare_scene("init")()
-                }, row_width=2
-            )
+            keyboard = {
+                "⬅️ Back":               lambda _: self.back(),
+                self._game.start_button: lambda _: self.prepare_scene("init")()
+            }
             self._scenes = self._game.scenes
             self._history = []
+
+            # saved progress of a game that still has that scene
+            saved = database.progress.get(self.user.chat_id, self._game.game_id)
+            if saved and saved["scene"] != "init" and saved["scene"] in self._scenes:
+                keyboard["▶️ Resume"] = lambda _: self.resume(saved)
+
+            self.chain.set_inline_keyboard(keyboard, row_width=2)
             self.chain.edit()
         except Exception as exception:
             self.exception(exception)
 
+    def game_buttons(
+        self,
+        summaries: typing.Iterable[database.GameSummary],
+        label: typing.Callable[[database.GameSummary], str] = lambda summary: summary.name,
+    ) -> dict[str, database.GameSummary]:
+        """
+        Keyboard of games by different creators. Names are only unique
+        per creator, so each button also names the author, and the game
+        id when two authors share a name too.
+        """
+        buttons: dict[str, database.GameSummary] = {}
+        for summary in summaries:
+            entry = database.creators.get(summary.creator)
+            author = entry[0] if entry is not None else database.User(summary.creator).name
+            text = f"{label(summary)} · {author}"
+            if text in buttons:
+                text = f"{text} ({summary.game_id})"
+            buttons[text] = summary
+        return buttons
+
+    def resume(self, saved: dict):
+        self._history = [scene for scene in saved["history"][:-1] if scene in self._scenes]
+        self.prepare_scene(saved["scene"])()
+
     def back(self):
         pass
 
@@ -72,6 +101,8 @@ class RunningMixin(telekit.Handler):
                         scene_name = self._history.pop()
             
             self._history.append(scene_name)
+            # kept in memory and written behind, not on every click
+            database.progress.record(self.user.chat_id, self._game.game_id, scene_name, self._history)
 
             print(self.chain.parent, self.chain)
 
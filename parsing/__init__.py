@@ -1,10 +1,25 @@
+import copy
+import hashlib
+
+from database._ram import Ram
+
 from . import (
     lexer, parser,
     token, nodes,
     builder
 )
 
+# Re-uploads of an unchanged script skip lexing, parsing and building.
+_analyzed = Ram.region("parsing", max_size=64)
+
 def analyze(src: str):
+    key = hashlib.sha256(src.encode()).hexdigest()
+    game = _analyzed.get_or_compute(key, lambda: _analyze(src))
+
+    # callers own their copy; the cached one must stay pristine
+    return copy.deepcopy(game)
+
+def _analyze(src: str):
     tokens = lexer.Lexer(src).tokenize()
     ast = parser.Parser(tokens).parse()
     game = builder.Builder(ast, src).build()
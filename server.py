@@ -1,11 +1,30 @@
+import os
+import signal
+import sys
+
 import telebot
 import telekit
 
 import handlers # Package with all your handlers
 
-from database import database
+from database import _disk, database
 
 TOKEN = database.Settings.token()
-bot = telebot.TeleBot(TOKEN)
+# Storage calls are locked per path (see QUESTLY_DB_LOCKS), so handlers
+# can run on more worker threads than telebot's default two.
+bot = telebot.TeleBot(TOKEN, num_threads=int(os.environ.get("QUESTLY_BOT_THREADS", "2")))
+
+# SIGTERM exits like Ctrl+C, so exit handlers (e.g. the player progress
+# flush, see database.ProgressStore) still run.
+signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+# The search index is opened, or built from every game, before the bot
+# polls, not in the handler thread of the first search.
+database.search.open()
+
+# Legacy ".py" values are rewritten in the binary format while the bot
+# serves (see database._disk.convert_legacy_values).
+if _disk.CONVERT_LEGACY:
+    _disk.start_legacy_conversion(database.disk)
 
 telekit.Server(bot).polling()
\ No newline at end of file